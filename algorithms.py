@@ -1,179 +1,168 @@
-import heapq
+import functools
 import random
-from collections import deque
-from grid import grid_instance
-from config import NODE_COLORS
-
-def reconstruct_path(came_from, current):
-    path = []
-    total_cost = 0
-    while current in came_from:
-        path.append(current)
-        prev = came_from[current]
-        total_cost += current.weight
-        current = prev
-    path.reverse()
-    
-    for node in path:
-        if node != grid_instance.start_node and node != grid_instance.end_node:
-            node.color = NODE_COLORS["PATH"]
+import time
+import engine
+import mazes
+from cache import ResultCache
+from landmarks import LandmarkCache
+from hpa import HierarchyCache
+from metrics import metrics_log, timed_steps
+from player import TracePlayer, TRACE_PATH
+from race import GridSnapshot
+from scheduler import WAITING
+from worker import CancellableTrace, search_worker, wait
+from grid import grid_instance, pack_color
+from config import (NODE_COLORS, RESULT_CACHE_SIZE, RESULT_CACHE_BYTES, HPA_CLUSTER_SIZE, STEP_BUDGET_MS,
+                    SEARCH_PROGRESS_DELAY_MS, SEARCH_PROGRESS_EVENTS)
+
+# Colour of each trace event kind, indexed by kind.
+EVENT_COLORS = [pack_color(NODE_COLORS[name]) for name in ("OPEN", "CLOSED", "OPEN_REVERSE", "CLOSED_REVERSE", "PATH")]
+
+def paint_path(result):
+    endpoints = (result.path[0], result.path[-1])
+    path_color = EVENT_COLORS[TRACE_PATH]
+    for index in result.path:
+        if index not in endpoints:
+            grid_instance.paint(index, path_color)
         yield
-    
-    yield total_cost
 
-def h(p1, p2):
-    return abs(p1.row - p2.row) + abs(p1.col - p2.col)
-
-def a_star_search():
+def paint_trace(trace, start, end):
+    # Replays a solver trace, one step per expanded cell.
+    endpoints = (start, end)
+    for event in trace:
+        index, kind = event >> 3, event & 7
+        if kind in (engine.TRACE_CLOSE, engine.TRACE_CLOSE_REVERSE):
+            yield
+        if index not in endpoints:
+            grid_instance.paint(index, EVENT_COLORS[kind])
+
+# The last search's trace, kept for seeking and saving after it has played.
+trace_player = TracePlayer(grid_instance, EVENT_COLORS)
+
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_BYTES)
+
+def load_trace(trace):
+    # Feeds trace to trace_player in SEARCH_PROGRESS_EVENTS slices, as many as
+    # fit in the step budget each frame, so a long trace never stalls one.
+    while len(trace_player.events) < len(trace):
+        deadline = time.perf_counter() + STEP_BUDGET_MS / 1000
+        while len(trace_player.events) < len(trace) and time.perf_counter() < deadline:
+            seen = len(trace_player.events)
+            trace_player.extend(trace[seen:seen + SEARCH_PROGRESS_EVENTS])
+        yield WAITING
+
+def animate_search(solver, name, frontier=None):
+    # Runs the headless solver on the worker thread against a snapshot of the
+    # grid, then replays its trace one expansion per step through
+    # trace_player, which can seek it afterwards. Until the solve is done
+    # each step just polls it, so frames keep coming; one that takes longer
+    # than SEARCH_PROGRESS_DELAY_MS is painted as its trace comes in.
+    # Results and traces are cached per grid content, so repeated runs skip
+    # the search. frontier is passed on to the solvers that take one (A* and
+    # Dijkstra).
     start = grid_instance.start_node
     end = grid_instance.end_node
     if not start or not end:
         yield
         return
 
-    count = 0
-    open_set = [(0, count, start)]
-    came_from = {}
-    
-    start.g_score = 0
-    start.f_score = h(start, end)
-    
-    open_set_hash = {start}
-
-    while open_set:
-        current = heapq.heappop(open_set)[2]
-        open_set_hash.remove(current)
-        
-        if current == end:
-            yield from reconstruct_path(came_from, end)
-            return
-
-        for neighbor in current.neighbors:
-            if neighbor.is_wall:
-                continue
-            
-            temp_g_score = current.g_score + neighbor.weight
-
-            if temp_g_score < neighbor.g_score:
-                came_from[neighbor] = current
-                neighbor.g_score = temp_g_score
-                neighbor.f_score = temp_g_score + h(neighbor, end)
-                if neighbor not in open_set_hash:
-                    count += 1
-                    heapq.heappush(open_set, (neighbor.f_score, count, neighbor))
-                    open_set_hash.add(neighbor)
-                    if neighbor != end:
-                        neighbor.color = NODE_COLORS["OPEN"]
-        yield
-        if current != start:
-            current.color = NODE_COLORS["CLOSED"]
-
-def dijkstra_search():
-    start = grid_instance.start_node
-    end = grid_instance.end_node
-    if not start or not end:
-        yield
-        return
-
-    count = 0
-    open_set = [(0, count, start)]
-    came_from = {}
-    
-    start.g_score = 0
-    
-    open_set_hash = {start}
-
-    while open_set:
-        current = heapq.heappop(open_set)[2]
-        open_set_hash.remove(current)
-
-        if current == end:
-            yield from reconstruct_path(came_from, end)
-            return
-
-        for neighbor in current.neighbors:
-            if neighbor.is_wall:
-                continue
-            
-            distance = current.g_score + neighbor.weight
-
-            if distance < neighbor.g_score:
-                came_from[neighbor] = current
-                neighbor.g_score = distance
-                if neighbor not in open_set_hash:
-                    count += 1
-                    heapq.heappush(open_set, (neighbor.g_score, count, neighbor))
-                    open_set_hash.add(neighbor)
-                    if neighbor != end:
-                        neighbor.color = NODE_COLORS["OPEN"]
-        yield
-        if current != start:
-            current.color = NODE_COLORS["CLOSED"]
+    started = time.perf_counter()
+    weights, cols = grid_instance.weights, grid_instance.cols
+    key = ResultCache.key((name, frontier), weights, cols, start.index, end.index, grid_instance.content_hash())
+    entry = result_cache.get(key)
+    cached = entry is not None
+    if entry is None:
+        trace = CancellableTrace('I')
+        snapshot = GridSnapshot(weights, cols, start.index, end.index)
+        if frontier:
+            solver = functools.partial(solver, frontier=frontier)
+        job = search_worker.start(solver, (snapshot.weights, cols, snapshot.start, snapshot.goal, trace), trace)
+        trace_player.begin(start.index, end.index)
+        while True:
+            message = job.poll()
+            if message is not None:
+                break
+            if job.elapsed >= SEARCH_PROGRESS_DELAY_MS / 1000:
+                # Only the prefix whose length was read is touched while the
+                # worker keeps appending.
+                seen = len(trace_player.events)
+                trace_player.extend(trace[seen:min(len(trace), seen + SEARCH_PROGRESS_EVENTS)])
+                trace_player.seek(trace_player.last_step)
+            yield WAITING
+        kind, result, solve_time = message
+        if kind == "error":
+            raise result
+        entry = result_cache.put(key, result, trace)
+        # The rest of the trace still goes in a frame's budget at a time.
+        yield from load_trace(trace)
+        trace_player.finish(result.path, result.cost)
+    else:
+        solve_time = time.perf_counter() - started
+        trace_player.begin(start.index, end.index)
+        yield from load_trace(entry.trace)
+        trace_player.finish(entry.result.path, entry.result.cost)
+    run = metrics_log.record(name, grid_instance.rows, cols, entry.result, solve_time, cached, frontier)
+
+    result = entry.result
+    yield from timed_steps(trace_player.steps(trace_player.path_step), run, "replay")
+    if result.found:
+        yield from timed_steps(trace_player.steps(), run, "path")
+        yield result.cost
+
+def a_star_search(frontier="heap"):
+    yield from animate_search(engine.a_star, "astar", frontier)
+
+landmark_cache = LandmarkCache()
+
+def alt_a_star_search(frontier="heap"):
+    # The landmark index is rebuilt only when the grid changed since last use,
+    # on the worker thread from the search's snapshot.
+    version = grid_instance.version
+    def solver(weights, cols, start, goal, trace, **options):
+        index = landmark_cache.get(weights, cols, version)
+        return engine.a_star(weights, cols, start, goal, trace, heuristic=index.heuristic(goal), **options)
+    yield from animate_search(solver, "astar_alt", frontier)
+
+hpa_cache = HierarchyCache(HPA_CLUSTER_SIZE)
+grid_instance.add_listener(hpa_cache.cell_changed)
+
+def hpa_search():
+    # The cluster graph outlives runs; a painted cell only drops the clusters
+    # it can affect. The worker searches a snapshot of it, and the clusters
+    # that search builds are kept for the next run. The replay shows the
+    # abstract search over entrance cells first, then the per-cluster
+    # refinement in the reverse-search colours.
+    graph = hpa_cache.snapshot(grid_instance.weights, grid_instance.cols)
+    def solver(weights, cols, start, goal, trace):
+        # graph holds its own copy of the same weights.
+        return graph.search(start, goal, trace)
+    yield from animate_search(solver, "hpa")
+
+def jps_search():
+    yield from animate_search(engine.jps, "jps")
+
+def bidirectional_a_star_search():
+    yield from animate_search(engine.bidirectional_a_star, "bi_astar")
+
+def dijkstra_search(frontier="heap"):
+    yield from animate_search(engine.dijkstra, "dijkstra", frontier)
+
+def bidirectional_dijkstra_search():
+    yield from animate_search(engine.bidirectional_dijkstra, "bi_dijkstra")
 
 def bfs_search():
-    start = grid_instance.start_node
-    end = grid_instance.end_node
-    if not start or not end:
-        yield
-        return
-
-    queue = deque([start])
-    came_from = {start: None}
-    visited = {start}
-
-    while queue:
-        current = queue.popleft()
-
-        if current == end:
-            yield from reconstruct_path(came_from, end)
-            return
-
-        for neighbor in current.neighbors:
-            if neighbor not in visited and not neighbor.is_wall:
-                visited.add(neighbor)
-                came_from[neighbor] = current
-                queue.append(neighbor)
-                if neighbor != end:
-                    neighbor.color = NODE_COLORS["OPEN"]
-        yield
-        if current != start:
-            current.color = NODE_COLORS["CLOSED"]
+    yield from animate_search(engine.bfs, "bfs")
 
 def dfs_search():
-    start = grid_instance.start_node
-    end = grid_instance.end_node
-    if not start or not end:
-        yield
-        return
+    yield from animate_search(engine.dfs, "dfs")
 
-    stack = [start]
-    came_from = {start: None}
-    visited = {start}
-
-    while stack:
-        current = stack.pop()
-
-        if current == end:
-            yield from reconstruct_path(came_from, end)
-            return
-
-        for neighbor in reversed(current.neighbors):
-            if neighbor not in visited and not neighbor.is_wall:
-                visited.add(neighbor)
-                came_from[neighbor] = current
-                stack.append(neighbor)
-                if neighbor != end:
-                    neighbor.color = NODE_COLORS["OPEN"]
-        yield
-        if current != start:
-            current.color = NODE_COLORS["CLOSED"]
+def fill_walls():
+    grid_instance.load_types(bytes([mazes.WALL]) * (grid_instance.rows * grid_instance.cols))
 
 def generate_maze_recursive_backtracking():
     grid = grid_instance.grid
     
-    for row in grid:
-        for node in row:
-            node.set_type("WALL")
+    fill_walls()
     yield
 
     start_node = grid[random.randrange(1, len(grid), 2)][random.randrange(1, len(grid[0]), 2)]
@@ -210,4 +199,38 @@ def generate_maze_recursive_backtracking():
         for node in row:
             if not node.is_wall:
                 node.color = NODE_COLORS["AIR"]
-    yield
\ No newline at end of file
+    yield
+
+def animate_carves(carves):
+    # Opens the cells from a mazes.py carve generator, one carve per step.
+    fill_walls()
+    yield
+    for cells in carves:
+        for index in cells:
+            grid_instance.set_cell_type(index, "AIR")
+        yield
+
+def generate_maze_kruskal(seed=None):
+    rng = random.Random(seed)
+    yield from animate_carves(mazes.kruskal_carves(grid_instance.rows, grid_instance.cols, rng))
+
+def generate_maze_prim(seed=None):
+    rng = random.Random(seed)
+    yield from animate_carves(mazes.prim_carves(grid_instance.rows, grid_instance.cols, rng))
+
+def generate_maze_eller(seed=None):
+    # Eller's builds the maze a row at a time, so it is shown a row at a time.
+    rng = random.Random(seed)
+    fill_walls()
+    yield
+    cols = grid_instance.cols
+    for row, codes in enumerate(mazes.eller_rows(grid_instance.rows, cols, rng)):
+        for col, code in enumerate(codes):
+            if code != mazes.WALL:
+                grid_instance.set_cell_type(row * cols + col, "AIR")
+        yield
+
+def load_maze(algorithm, seed=None):
+    # mazes.generate() on the worker thread, loaded into the grid once it is done.
+    job = search_worker.start(mazes.generate, (algorithm, grid_instance.rows, grid_instance.cols, seed))
+    grid_instance.load_types((yield from wait(job)))
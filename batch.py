@@ -0,0 +1,192 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import engine
+import storage
+
+# Headless batch solver: runs the engine.py solvers over grid files saved in
+# the storage.py format, in a process pool, and streams one record per solve
+# as CSV or JSON lines while the batch runs.
+#
+#   python batch.py maps/ --algorithms astar jps --output results.csv
+#   find maps -name '*.pfg' | python batch.py - --pairs pairs.txt --format jsonl
+#
+# Each worker memory-maps a grid file only long enough to check it and turn
+# its cells into a private weights array, one byte per cell. It keeps the
+# weights of the last few maps it solved on, up to MAP_CACHE_BYTES, so memory
+# grows with the workers times that limit. Jobs are generated lazily and only a
+# bounded number are in flight, so neither the job list nor the results are
+# ever held in memory as a whole.
+
+FIELDS = ["file", "algorithm", "start", "goal", "found", "cost", "path_length", "expanded", "time_ms", "error"]
+GRID_SUFFIX = ".pfg"
+# Maps whose weights each worker keeps between jobs, by count and by bytes.
+MAP_CACHE_SIZE = 4
+MAP_CACHE_BYTES = 64 * 1024 * 1024
+# Jobs queued per worker ahead of the one being written out.
+JOBS_PER_WORKER = 4
+
+_maps = OrderedDict()
+_map_bytes = 0
+
+def _map_weights(path):
+    # (weights, rows, cols, start, end) for the grid file at path.
+    global _map_bytes
+    entry = _maps.get(path)
+    if entry is None:
+        with storage.open_map(path) as map_file:
+            map_file.validate()
+            entry = (map_file.weights(), map_file.rows, map_file.cols, map_file.start, map_file.end)
+        _maps[path] = entry
+        _map_bytes += len(entry[0])
+        # The newest map stays even on its own over the limit; it is in use.
+        while len(_maps) > 1 and (len(_maps) > MAP_CACHE_SIZE or _map_bytes > MAP_CACHE_BYTES):
+            _map_bytes -= len(_maps.popitem(last=False)[1][0])
+    else:
+        _maps.move_to_end(path)
+    return entry
+
+def parse_cell(text):
+    # A cell index, or "row,col".
+    if "," in text:
+        row, col = text.split(",")
+        return int(row), int(col)
+    return int(text)
+
+def format_cell(cell):
+    return f"{cell[0]},{cell[1]}" if isinstance(cell, tuple) else cell
+
+def _cell_index(cell, rows, cols):
+    # Row and column are checked separately: "0,45" must not wrap onto the
+    # next row of a narrower grid.
+    if cell is None:
+        raise ValueError("grid file has no start/end and no pair was given")
+    if isinstance(cell, tuple):
+        row, col = cell
+        if not (0 <= row < rows and 0 <= col < cols):
+            raise ValueError(f"cell {format_cell(cell)} is outside the {rows}x{cols} grid")
+        return row * cols + col
+    if not 0 <= cell < rows * cols:
+        raise ValueError(f"cell {cell} is outside the {rows}x{cols} grid")
+    return cell
+
+def run_job(path, algorithm, start, goal):
+    # Runs in a worker. start/goal of None mean the endpoints stored in the file.
+    record = {"file": path, "algorithm": algorithm, "start": format_cell(start), "goal": format_cell(goal)}
+    try:
+        weights, rows, cols, file_start, file_end = _map_weights(path)
+        start = _cell_index(file_start if start is None else start, rows, cols)
+        goal = _cell_index(file_end if goal is None else goal, rows, cols)
+        record["start"], record["goal"] = start, goal
+        started = time.perf_counter()
+        result = engine.solve(algorithm, weights, cols, start, goal)
+        record["time_ms"] = (time.perf_counter() - started) * 1000
+    except (OSError, ValueError) as e:
+        record["error"] = str(e)
+        return record
+    record.update(found=result.found, cost=result.cost, path_length=len(result.path), expanded=result.expanded)
+    return record
+
+def grid_paths(sources):
+    # Files as given, directories searched for grid files, "-" for paths read
+    # from stdin one per line.
+    for source in sources:
+        if source == "-":
+            for line in sys.stdin:
+                if line.strip():
+                    yield line.strip()
+        elif os.path.isdir(source):
+            for path in sorted(Path(source).rglob("*" + GRID_SUFFIX)):
+                yield str(path)
+        else:
+            yield source
+
+def read_pairs(path):
+    # One "start goal" pair per line; blank lines and # comments are skipped.
+    pairs = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            line = line.split("#")[0].strip()
+            if not line:
+                continue
+            try:
+                start, goal = line.split()
+                pairs.append((parse_cell(start), parse_cell(goal)))
+            except ValueError:
+                raise ValueError(f"{path}:{number}: expected 'start goal'")
+    return pairs
+
+def jobs(paths, algorithms, pairs):
+    # Grouped by file so consecutive jobs hit the workers' map cache.
+    for path in paths:
+        for start, goal in pairs:
+            for algorithm in algorithms:
+                yield path, algorithm, start, goal
+
+def run(jobs, workers=None):
+    # Yields one record per job, in job order, keeping at most
+    # JOBS_PER_WORKER * workers jobs in flight.
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        for job in jobs:
+            pending.append(executor.submit(run_job, *job))
+            if len(pending) >= workers * JOBS_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+class CsvWriter:
+    def __init__(self, f):
+        self.f = f
+        self.writer = csv.DictWriter(f, fieldnames=FIELDS)
+        self.writer.writeheader()
+
+    def write(self, record):
+        self.writer.writerow(record)
+        self.f.flush()
+
+class JsonLinesWriter:
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, record):
+        self.f.write(json.dumps({field: record.get(field) for field in FIELDS}) + "\n")
+        self.f.flush()
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonLinesWriter}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve grid files headlessly and stream the results.")
+    parser.add_argument("sources", nargs="+", help=f"grid files, directories of {GRID_SUFFIX} files, or - to read paths from stdin")
+    parser.add_argument("--algorithms", nargs="+", choices=list(engine.SOLVERS), default=["astar"])
+    parser.add_argument("--pairs", help="file of 'start goal' pairs (cell indices or row,col); default: each file's own start and end")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--format", choices=list(WRITERS), help="default: from the --output suffix, else csv")
+    parser.add_argument("--output", help="write results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        pairs = read_pairs(args.pairs) if args.pairs else [(None, None)]
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    output_format = args.format or ("jsonl" if args.output and args.output.endswith((".jsonl", ".json")) else "csv")
+
+    f = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        writer = WRITERS[output_format](f)
+        for record in run(jobs(grid_paths(args.sources), args.algorithms, pairs), args.workers):
+            writer.write(record)
+    finally:
+        if f is not sys.stdout:
+            f.close()
+
+if __name__ == '__main__':
+    main()
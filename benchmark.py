@@ -0,0 +1,278 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import engine
+import landmarks
+import hpa
+from frontiers import FRONTIER_NAMES
+import mazes
+from config import NODE_WEIGHTS
+
+# Headless benchmark for the solvers in engine.py and the maze generators.
+#
+#   python benchmark.py --sizes 25 100 500 --output bench.json
+#   python benchmark.py --compare old.json --output new.json
+#
+# Every grid is generated from --seed, so two runs on different commits measure
+# exactly the same work.
+
+DEFAULT_SIZES = [25, 100, 500, 1000, 2000]
+# Solvers that accept a frontier option.
+FRONTIER_SOLVERS = ["astar", "dijkstra"]
+GRID_KINDS = ["empty", "random_walls", "maze", "weighted"]
+WALL_DENSITY = 0.3
+
+def _endpoints(size):
+    # Odd coordinates are always carved by the maze generator.
+    last = size - 2 if size % 2 else size - 3
+    return size + 1, last * size + last
+
+def make_empty(size, rng):
+    return bytearray([NODE_WEIGHTS["AIR"]]) * (size * size)
+
+def make_random_walls(size, rng):
+    air = NODE_WEIGHTS["AIR"]
+    return bytearray(0 if rng.random() < WALL_DENSITY else air for _ in range(size * size))
+
+def make_weighted(size, rng):
+    terrain = [NODE_WEIGHTS[t] for t in ("AIR", "AIR", "AIR", "DIRT", "MUD", "TAR")]
+    return bytearray(rng.choice(terrain) for _ in range(size * size))
+
+def make_maze(size, rng):
+    from grid import grid_instance
+    from algorithms import generate_maze_recursive_backtracking
+
+    state = random.getstate()
+    random.seed(rng.random())
+    grid_instance.init_grid(size, size)
+    for _ in generate_maze_recursive_backtracking():
+        pass
+    random.setstate(state)
+    return bytearray(grid_instance.weights)
+
+GENERATORS = {
+    "empty": make_empty,
+    "random_walls": make_random_walls,
+    "maze": make_maze,
+    "weighted": make_weighted,
+}
+
+def build_grid(kind, size, seed):
+    weights = GENERATORS[kind](size, random.Random(f"{kind}-{size}-{seed}"))
+    start, goal = _endpoints(size)
+    weights[start] = weights[goal] = NODE_WEIGHTS["START"]
+    return weights, start, goal
+
+def _peak_memory(func, *args):
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def bench_maze(size, seed, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        make_maze(size, random.Random(f"maze-{size}-{seed}"))
+        times.append(time.perf_counter() - started)
+    return {
+        "case": "maze_generation",
+        "grid": "maze",
+        "size": size,
+        "seed": seed,
+        "wall_time": min(times),
+        "peak_memory": _peak_memory(make_maze, size, random.Random(f"maze-{size}-{seed}")),
+    }
+
+def bench_bulk_maze(algorithm, size, seed, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        mazes.generate(algorithm, size, size, seed)
+        times.append(time.perf_counter() - started)
+    return {
+        "case": "maze_generation",
+        "algorithm": algorithm,
+        "grid": "maze",
+        "size": size,
+        "seed": seed,
+        "wall_time": min(times),
+        "peak_memory": _peak_memory(mazes.generate, algorithm, size, size, seed),
+    }
+
+def bench_landmarks(kind, size, seed, weights, count):
+    started = time.perf_counter()
+    index = landmarks.LandmarkIndex(weights, size, count, seed)
+    return index, {
+        "case": "landmark_build",
+        "grid": kind,
+        "size": size,
+        "seed": seed,
+        "landmarks": count,
+        "wall_time": time.perf_counter() - started,
+    }
+
+def bench_hpa(kind, size, seed, weights, start, goal, repeat, cluster_size):
+    # The first query builds the clusters it touches; later ones reuse them.
+    graph = hpa.ClusterGraph(weights, size, cluster_size)
+    started = time.perf_counter()
+    graph.search(start, goal)
+    cold_time = time.perf_counter() - started
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = graph.search(start, goal)
+        times.append(time.perf_counter() - started)
+    return {
+        "case": "search",
+        "algorithm": "hpa",
+        "grid": kind,
+        "size": size,
+        "seed": seed,
+        "cluster_size": cluster_size,
+        "clusters_built": graph.builds,
+        "cold_time": cold_time,
+        "wall_time": min(times),
+        "expanded": result.expanded,
+        "max_open": result.max_open,
+        "found": result.found,
+        "cost": result.cost,
+        "path_length": len(result.path),
+    }
+
+def bench_search(algorithm, kind, size, seed, weights, start, goal, repeat, **options):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = engine.solve(algorithm, weights, size, start, goal, **options)
+        times.append(time.perf_counter() - started)
+    wall_time = min(times)
+    return {
+        "case": "search",
+        "algorithm": algorithm,
+        "grid": kind,
+        "size": size,
+        "seed": seed,
+        "wall_time": wall_time,
+        "expanded": result.expanded,
+        "expanded_per_sec": result.expanded / wall_time if wall_time else None,
+        "max_open": result.max_open,
+        "pushes": result.pushes,
+        "pops": result.pops,
+        "stale": result.stale,
+        "peak_memory": _peak_memory(lambda: engine.solve(algorithm, weights, size, start, goal, **options)),
+        "found": result.found,
+        "cost": result.cost,
+        "path_length": len(result.path),
+    }
+
+def _commit():
+    # Asked of the repository this file is in, whatever the working directory.
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _case_key(entry):
+    return (entry["case"], entry.get("algorithm"), entry.get("frontier"), entry["grid"], entry["size"], entry["seed"])
+
+def compare(previous, current):
+    baseline = {_case_key(entry): entry for entry in previous["results"]}
+    for entry in current["results"]:
+        old = baseline.get(_case_key(entry))
+        if old is None or not old["wall_time"]:
+            continue
+        ratio = entry["wall_time"] / old["wall_time"]
+        label = " ".join(str(part) for part in _case_key(entry)[:5] if part is not None)
+        print(f"{label:<40} {old['wall_time']:>9.4f}s -> {entry['wall_time']:>9.4f}s  x{ratio:.2f}",
+              file=sys.stderr)
+
+def run(sizes, grids, algorithms, seed, repeat, landmark_count=0, frontiers=("heap",), cluster_size=0):
+    results = []
+    for size in sizes:
+        if "maze" in grids:
+            results.append(bench_maze(size, seed, repeat))
+            for algorithm in mazes.GENERATORS:
+                results.append(bench_bulk_maze(algorithm, size, seed, repeat))
+        for kind in grids:
+            weights, start, goal = build_grid(kind, size, seed)
+            for algorithm in algorithms:
+                results.append(bench_search(algorithm, kind, size, seed, weights, start, goal, repeat))
+                entry = results[-1]
+                print(f"{algorithm:>8} {kind:>12} {size:>5}  {entry['wall_time']:.4f}s  "
+                      f"{entry['expanded']} expanded", file=sys.stderr)
+                if algorithm not in FRONTIER_SOLVERS:
+                    continue
+                for frontier in frontiers:
+                    if frontier == "heap":
+                        continue
+                    results.append(bench_search(algorithm, kind, size, seed, weights, start, goal, repeat,
+                                                frontier=frontier))
+                    entry = results[-1]
+                    entry["frontier"] = frontier
+                    print(f"{algorithm + '/' + frontier:>16} {kind:>12} {size:>5}  {entry['wall_time']:.4f}s",
+                          file=sys.stderr)
+            if landmark_count:
+                index, build = bench_landmarks(kind, size, seed, weights, landmark_count)
+                results.append(build)
+                results.append(bench_search("astar", kind, size, seed, weights, start, goal, repeat,
+                                            heuristic=index.heuristic(goal)))
+                results[-1]["algorithm"] = "astar_alt"
+            if cluster_size:
+                results.append(bench_hpa(kind, size, seed, weights, start, goal, repeat, cluster_size))
+                entry = results[-1]
+                print(f"{'hpa':>8} {kind:>12} {size:>5}  {entry['wall_time']:.4f}s  "
+                      f"(first query {entry['cold_time']:.4f}s)", file=sys.stderr)
+    return {
+        "meta": {
+            "commit": _commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pathfinding solvers headlessly.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--grids", nargs="+", choices=GRID_KINDS, default=GRID_KINDS)
+    parser.add_argument("--algorithms", nargs="+", choices=list(engine.SOLVERS), default=list(engine.SOLVERS))
+    parser.add_argument("--frontiers", nargs="+", choices=FRONTIER_NAMES, default=FRONTIER_NAMES,
+                        help="open-set structures to time A* and Dijkstra with")
+    parser.add_argument("--landmarks", type=int, default=0, help="also run A* with an ALT index of this many landmarks")
+    parser.add_argument("--clusters", type=int, default=0, help="also time HPA* with clusters of this many cells a side")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per case; the fastest is reported")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="previous JSON report to print timing ratios against")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.grids, args.algorithms, args.seed, args.repeat, args.landmarks, args.frontiers, args.clusters)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+from array import array
+from collections import OrderedDict
+import engine
+
+# LRU cache of solver results keyed by (algorithm, start, goal, grid shape,
+# grid content hash). Repeating a query on an unchanged grid, or moving an
+# endpoint back to where it was, returns the stored result without searching.
+# The content hash is whatever the caller maintains for its weights, e.g.
+# Grid.content_hash().
+#
+# Entries are bounded by count and by bytes: a trace holds 4 bytes per event
+# and can run to tens of megabytes on a large grid, so the byte limit is the
+# one that usually applies. An entry bigger than the whole limit isn't kept.
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class CacheEntry:
+    __slots__ = ("result", "trace", "nbytes")
+
+    def __init__(self, result, trace):
+        self.result = result
+        self.trace = trace
+        # Path cells are counted at 4 bytes too; the rest of the result is small.
+        self.nbytes = 4 * len(result.path)
+        if trace is not None:
+            self.nbytes += trace.itemsize * len(trace)
+
+class ResultCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, result, trace=None):
+        # Returns the new entry, whether or not it fitted.
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        entry = self.entries[key] = CacheEntry(result, trace)
+        self.nbytes += entry.nbytes
+        while self.entries and (len(self.entries) > self.max_entries or self.nbytes > self.max_bytes):
+            self.nbytes -= self.entries.popitem(last=False)[1].nbytes
+        return entry
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+    @staticmethod
+    def key(algorithm, weights, cols, start, goal, content_hash):
+        return (algorithm, start, goal, len(weights), cols, content_hash)
+
+    def solve(self, algorithm, weights, cols, start, goal, content_hash, record_trace=False):
+        # Returns the cache entry for the query, running the solver on a miss.
+        # A hit without a stored trace is re-run when a trace is asked for.
+        key = self.key(algorithm, weights, cols, start, goal, content_hash)
+        entry = self.get(key)
+        if entry is not None and (entry.trace is not None or not record_trace):
+            return entry
+
+        trace = array('I') if record_trace else None
+        result = engine.solve(algorithm, weights, cols, start, goal, trace)
+        return self.put(key, result, trace)
@@ -1,16 +1,27 @@
-import pygame
-
 WIDTH = 1200
 HEIGHT = 850
 FPS = 60
 
+# Rows and columns of a new grid. The panel it is drawn in has a fixed size;
+# the viewport picks the zoom that fits the map into it (Viewport.fit).
 GRID_SIZE = 25
-GRID_PANEL_HEIGHT = 750 
-CELL_SIZE = GRID_PANEL_HEIGHT // GRID_SIZE
-GRID_WIDTH = GRID_HEIGHT = CELL_SIZE * GRID_SIZE
+GRID_PANEL_HEIGHT = 750
+GRID_WIDTH = GRID_HEIGHT = GRID_PANEL_HEIGHT
 GRID_TOP_LEFT_X = (WIDTH - GRID_WIDTH) // 2
 GRID_TOP_LEFT_Y = 20
 
+# Zoom levels for the grid viewport: whole pixels per cell when zoomed in, and
+# whole cells per pixel when zoomed out further than one pixel per cell.
+ZOOM_SIZES = [1, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 25, 30, 40, 50, 60]
+ZOOM_STEPS = [64, 32, 16, 8, 4, 3, 2]
+# "buffer" draws the grid from a cols x rows pixel surface with one scaled
+# blit per frame; "cells" draws changed cells one rect at a time, falling back
+# to the buffer below LOD_CELL_SIZE pixels per cell.
+GRID_RENDERER = "buffer"
+LOD_CELL_SIZE = 8
+# Grid lines are drawn from this many pixels per cell up.
+GRID_LINE_MIN_SIZE = 3
+
 COLOR_WHITE = (255, 255, 255)
 COLOR_BLACK = (0, 0, 0)
 COLOR_GRAY_LIGHT = (220, 220, 220)
@@ -32,6 +43,8 @@ NODE_COLORS = {
     "END": COLOR_RED,
     "OPEN": (173, 216, 230),
     "CLOSED": (176, 224, 230),
+    "OPEN_REVERSE": (255, 218, 185),
+    "CLOSED_REVERSE": (255, 228, 196),
     "PATH": COLOR_YELLOW,
     "AIR": COLOR_WHITE,
     "DIRT": COLOR_SAND,
@@ -49,7 +62,73 @@ NODE_WEIGHTS = {
     "END": 1
 }
 
+# One byte per cell in the array-backed grid. Weights are stored as bytes too,
+# with 0 marking an impassable cell, so every weight above must fit in 1..255.
+NODE_TYPES = ["AIR", "WALL", "START", "END", "DIRT", "MUD", "TAR"]
+NODE_TYPE_CODES = {node_type: code for code, node_type in enumerate(NODE_TYPES)}
+
 BOTTOM_PANEL_HEIGHT = HEIGHT - GRID_HEIGHT - GRID_TOP_LEFT_Y
 BOTTOM_PANEL_Y = GRID_HEIGHT + GRID_TOP_LEFT_Y
 
-STATS_BAR_HEIGHT = 40
\ No newline at end of file
+STATS_BAR_HEIGHT = 40
+SIDE_PANEL_X = 10
+SIDE_PANEL_Y = STATS_BAR_HEIGHT + 10
+SIDE_PANEL_WIDTH = GRID_TOP_LEFT_X - 20
+SIDE_PANEL_HEIGHT = BOTTOM_PANEL_Y - SIDE_PANEL_Y - 10
+
+# Algorithm playback: how much of each frame may be spent advancing the active
+# generator, and the selectable speeds (steps per frame, None = as many as fit;
+# below 1, a step every few frames).
+STEP_BUDGET_MS = 8
+SPEED_MODES = [("1x", 1), ("10x", 10), ("100x", 100), ("Instant", None), ("0.25x", 0.25)]
+# Searches run on a worker thread (worker.py); one still running after this
+# long is painted as it goes and shows its progress in the stats bar.
+SEARCH_PROGRESS_DELAY_MS = 250
+# Trace events painted per frame, at most, while such a search runs.
+SEARCH_PROGRESS_EVENTS = 8000
+
+# Rendered UI text surfaces kept by ui.text_cache.
+TEXT_CACHE_SIZE = 256
+
+GRID_SAVE_FILE = "saved_grid.pfg"
+TRACE_SAVE_FILE = "saved_trace.pft"
+# Search results kept for replay (cache.py), by count and by the bytes their
+# traces take.
+RESULT_CACHE_SIZE = 32
+RESULT_CACHE_BYTES = 128 * 1024 * 1024
+METRICS_FILE = "metrics"  # exported as metrics.json / metrics.csv
+
+# Open-set structure used by A*, A* (Landmarks) and Dijkstra; see frontiers.py.
+FRONTIER_MODES = [("heap", "Binary Heap"), ("bucket", "Bucket Queue"), ("indexed", "Indexed Heap")]
+
+# Cluster edge length, in cells, for HPA* (hpa.py).
+HPA_CLUSTER_SIZE = 10
+
+# Flow Field mode (flowfield.py): cells are shaded from FLOW_NEAR_COLOR at the
+# End node to FLOW_FAR_COLOR, and get direction arrows once they are at least
+# FLOW_ARROW_MIN_SIZE pixels across.
+FLOW_NEAR_COLOR = (255, 245, 160)
+FLOW_FAR_COLOR = (80, 50, 160)
+FLOW_ARROW_COLOR = COLOR_GRAY_DARK
+FLOW_ARROW_MIN_SIZE = 12
+# Heatmap cells painted per frame after the field is (re)built.
+FLOW_PAINT_CELLS = 10000
+
+MAZE_GENERATORS = [("backtracking", "Backtracker"), ("kruskal", "Kruskal"), ("prim", "Prim"), ("eller", "Eller")]
+
+INFO_PANEL_X = GRID_TOP_LEFT_X + GRID_WIDTH + 10
+INFO_PANEL_Y = SIDE_PANEL_Y
+INFO_PANEL_WIDTH = WIDTH - INFO_PANEL_X - 10
+INFO_PANEL_HEIGHT = SIDE_PANEL_HEIGHT
+
+ALGORITHM_LABELS = {
+    "astar": "A*",
+    "astar_alt": "A* (Landmarks)",
+    "hpa": "HPA*",
+    "jps": "Jump Point Search",
+    "dijkstra": "Dijkstra",
+    "bi_astar": "Bidirectional A*",
+    "bi_dijkstra": "Bidirectional Dijkstra",
+    "bfs": "BFS",
+    "dfs": "DFS",
+}
@@ -0,0 +1,577 @@
+import heapq
+from array import array
+from collections import deque
+from frontiers import FRONTIERS
+
+# Pure pathfinding on a flat grid description. Nothing in here imports pygame or
+# touches the Grid singleton, so it can be used headless.
+#
+# A grid is described by a flat sequence of per-cell entry costs indexed by
+# row*cols+col (a cost of 0 marks an impassable cell, as in Grid.weights), the
+# column count, and the start and goal cell indices. Entering a cell costs its
+# weight, so a path's cost is the sum of the weights of every cell after start.
+#
+# The solvers here only read the weights during a call. The structures that
+# outlive a search (hpa.ClusterGraph, incremental.DStarLite, flowfield.FlowField)
+# keep reading the buffer they were given instead: edit it in place, then report
+# the edited cells to them and they repair only what depended on those cells.
+
+INF = float('inf')
+
+# Optional trace events, packed as (cell index << 3) | event.
+TRACE_OPEN = 0
+TRACE_CLOSE = 1
+TRACE_OPEN_REVERSE = 2
+TRACE_CLOSE_REVERSE = 3
+
+class SearchResult:
+    # Besides the path, every solver reports its work: cells expanded, pushes
+    # onto and pops off the open set, popped entries that were already closed
+    # (stale), and the peak open-set size.
+    def __init__(self, path, cost, expanded, max_open=0, pushes=0, pops=0, stale=0):
+        self.path = path
+        self.cost = cost
+        self.expanded = expanded
+        self.max_open = max_open
+        self.pushes = pushes
+        self.pops = pops
+        self.stale = stale
+
+    @property
+    def found(self):
+        return bool(self.path)
+
+    def __repr__(self):
+        return f"SearchResult(cost={self.cost}, length={len(self.path)}, expanded={self.expanded})"
+
+def _neighbors(index, cols, size):
+    neighbors = []
+    if index >= cols: neighbors.append(index - cols)
+    if index + cols < size: neighbors.append(index + cols)
+    col = index % cols
+    if col > 0: neighbors.append(index - 1)
+    if col < cols - 1: neighbors.append(index + 1)
+    return neighbors
+
+def _build_result(weights, came_from, start, goal, expanded, max_open, pushes, pops, stale=0):
+    path = [goal]
+    while path[-1] != start:
+        path.append(came_from[path[-1]])
+    path.reverse()
+    cost = sum(weights[index] for index in path[1:])
+    return SearchResult(path, cost, expanded, max_open, pushes, pops, stale)
+
+def _check_endpoints(weights, start, goal):
+    if not weights[start] or not weights[goal]:
+        return SearchResult([], None, 0)
+    if start == goal:
+        return SearchResult([start], 0, 0)
+    return None
+
+def manhattan(cols, goal):
+    goal_row, goal_col = divmod(goal, cols)
+    def h(index):
+        row, col = divmod(index, cols)
+        return abs(row - goal_row) + abs(col - goal_col)
+    return h
+
+def _frontier_search(weights, cols, start, goal, trace, h, frontier):
+    # A* over one of the pluggable open sets in frontiers.py. With h == 0 this
+    # is Dijkstra. The inline heapq loops below stay the default because they
+    # avoid a method call per push and pop.
+    size = len(weights)
+    # Consistent heuristics keep every queued key within 2 * max weight of the
+    # lowest one, which is what the bucket queue needs.
+    open_set = FRONTIERS[frontier](size, 2 * max(weights))
+    open_set.push(start, h(start))
+    pushes = 1
+    g_score = {start: 0}
+    came_from = {}
+    closed = set()
+    expanded = 0
+    max_open = 1
+    stale = 0
+
+    while open_set:
+        current = open_set.pop()
+        if current in closed:
+            stale += 1
+            continue
+        if current == goal:
+            return _build_result(weights, came_from, start, goal, expanded, max_open,
+                                 pushes, expanded + stale + 1, stale)
+        closed.add(current)
+        expanded += 1
+
+        current_g = g_score[current]
+        for neighbor in _neighbors(current, cols, size):
+            weight = weights[neighbor]
+            if not weight or neighbor in closed:
+                continue
+            temp_g_score = current_g + weight
+            if temp_g_score < g_score.get(neighbor, INF):
+                came_from[neighbor] = current
+                g_score[neighbor] = temp_g_score
+                pushes += 1
+                open_set.push(neighbor, temp_g_score + h(neighbor))
+                if len(open_set) > max_open:
+                    max_open = len(open_set)
+                if trace is not None:
+                    trace.append(neighbor << 3 | TRACE_OPEN)
+        if trace is not None:
+            trace.append(current << 3 | TRACE_CLOSE)
+
+    return SearchResult([], None, expanded, max_open, pushes, expanded + stale, stale)
+
+def _zero(index):
+    return 0
+
+def a_star(weights, cols, start, goal, trace=None, heuristic=None, frontier="heap"):
+    # heuristic, if given, maps a cell index to a consistent lower bound on the
+    # remaining cost to goal; Manhattan distance is used otherwise. frontier
+    # picks the open set: "heap" (inline heapq) or one of frontiers.FRONTIERS.
+    early = _check_endpoints(weights, start, goal)
+    if early:
+        return early
+
+    size = len(weights)
+    h = heuristic or manhattan(cols, goal)
+    if frontier != "heap":
+        return _frontier_search(weights, cols, start, goal, trace, h, frontier)
+
+    count = 0
+    open_set = [(h(start), count, start)]
+    g_score = {start: 0}
+    came_from = {}
+    closed = set()
+    expanded = 0
+    max_open = 1
+    stale = 0
+
+    while open_set:
+        current = heapq.heappop(open_set)[2]
+        if current in closed:
+            stale += 1
+            continue
+        if current == goal:
+            return _build_result(weights, came_from, start, goal, expanded, max_open,
+                                 count + 1, expanded + stale + 1, stale)
+        closed.add(current)
+        expanded += 1
+
+        current_g = g_score[current]
+        for neighbor in _neighbors(current, cols, size):
+            weight = weights[neighbor]
+            if not weight or neighbor in closed:
+                continue
+            temp_g_score = current_g + weight
+            if temp_g_score < g_score.get(neighbor, INF):
+                came_from[neighbor] = current
+                g_score[neighbor] = temp_g_score
+                count += 1
+                heapq.heappush(open_set, (temp_g_score + h(neighbor), count, neighbor))
+                if len(open_set) > max_open:
+                    max_open = len(open_set)
+                if trace is not None:
+                    trace.append(neighbor << 3 | TRACE_OPEN)
+        if trace is not None:
+            trace.append(current << 3 | TRACE_CLOSE)
+
+    return SearchResult([], None, expanded, max_open, count + 1, expanded + stale, stale)
+
+def dijkstra(weights, cols, start, goal, trace=None, frontier="heap"):
+    early = _check_endpoints(weights, start, goal)
+    if early:
+        return early
+    if frontier != "heap":
+        return _frontier_search(weights, cols, start, goal, trace, _zero, frontier)
+
+    size = len(weights)
+    count = 0
+    open_set = [(0, count, start)]
+    g_score = {start: 0}
+    came_from = {}
+    closed = set()
+    expanded = 0
+    max_open = 1
+    stale = 0
+
+    while open_set:
+        current_g, _, current = heapq.heappop(open_set)
+        if current in closed:
+            stale += 1
+            continue
+        if current == goal:
+            return _build_result(weights, came_from, start, goal, expanded, max_open,
+                                 count + 1, expanded + stale + 1, stale)
+        closed.add(current)
+        expanded += 1
+
+        for neighbor in _neighbors(current, cols, size):
+            weight = weights[neighbor]
+            if not weight or neighbor in closed:
+                continue
+            distance = current_g + weight
+            if distance < g_score.get(neighbor, INF):
+                came_from[neighbor] = current
+                g_score[neighbor] = distance
+                count += 1
+                heapq.heappush(open_set, (distance, count, neighbor))
+                if len(open_set) > max_open:
+                    max_open = len(open_set)
+                if trace is not None:
+                    trace.append(neighbor << 3 | TRACE_OPEN)
+        if trace is not None:
+            trace.append(current << 3 | TRACE_CLOSE)
+
+    return SearchResult([], None, expanded, max_open, count + 1, expanded + stale, stale)
+
+def bfs(weights, cols, start, goal, trace=None):
+    early = _check_endpoints(weights, start, goal)
+    if early:
+        return early
+
+    size = len(weights)
+    queue = deque([start])
+    came_from = {start: None}
+    expanded = 0
+    max_open = 1
+
+    while queue:
+        current = queue.popleft()
+        if current == goal:
+            return _build_result(weights, came_from, start, goal, expanded, max_open,
+                                 len(came_from), expanded + 1)
+        expanded += 1
+
+        for neighbor in _neighbors(current, cols, size):
+            if neighbor not in came_from and weights[neighbor]:
+                came_from[neighbor] = current
+                queue.append(neighbor)
+                if len(queue) > max_open:
+                    max_open = len(queue)
+                if trace is not None:
+                    trace.append(neighbor << 3 | TRACE_OPEN)
+        if trace is not None:
+            trace.append(current << 3 | TRACE_CLOSE)
+
+    return SearchResult([], None, expanded, max_open, len(came_from), expanded)
+
+def dfs(weights, cols, start, goal, trace=None):
+    early = _check_endpoints(weights, start, goal)
+    if early:
+        return early
+
+    size = len(weights)
+    stack = [start]
+    came_from = {start: None}
+    expanded = 0
+    max_open = 1
+
+    while stack:
+        current = stack.pop()
+        if current == goal:
+            return _build_result(weights, came_from, start, goal, expanded, max_open,
+                                 len(came_from), expanded + 1)
+        expanded += 1
+
+        for neighbor in reversed(_neighbors(current, cols, size)):
+            if neighbor not in came_from and weights[neighbor]:
+                came_from[neighbor] = current
+                stack.append(neighbor)
+                if len(stack) > max_open:
+                    max_open = len(stack)
+                if trace is not None:
+                    trace.append(neighbor << 3 | TRACE_OPEN)
+        if trace is not None:
+            trace.append(current << 3 | TRACE_CLOSE)
+
+    return SearchResult([], None, expanded, max_open, len(came_from), expanded)
+
+def _has_weighted(weights):
+    # True if any cell costs more than 1, i.e. anything besides walls and AIR.
+    return bool(bytes(weights).translate(None, b"\x00\x01"))
+
+def _expand_jumps(came_from, start, goal, cols):
+    # Fills in the straight segments between consecutive jump points.
+    jump_points = [goal]
+    while jump_points[-1] != start:
+        jump_points.append(came_from[jump_points[-1]])
+    jump_points.reverse()
+
+    path = [start]
+    for target in jump_points[1:]:
+        current = path[-1]
+        step = cols if abs(target - current) >= cols else 1
+        if target < current:
+            step = -step
+        while current != target:
+            current += step
+            path.append(current)
+    return path
+
+def jps(weights, cols, start, goal, trace=None):
+    # Jump Point Search for 4-connected grids, using a horizontal-first
+    # canonical ordering. Jumps only cross unit-cost cells; weighted cells and
+    # the cells next to them become jump points that are expanded like plain A*,
+    # so paths through DIRT/MUD/TAR stay optimal.
+    early = _check_endpoints(weights, start, goal)
+    if early:
+        return early
+
+    size = len(weights)
+    mixed = _has_weighted(weights)
+    h = manhattan(cols, goal)
+
+    def near_weighted(index):
+        col = index % cols
+        return ((index >= cols and weights[index - cols] > 1) or
+                (index + cols < size and weights[index + cols] > 1) or
+                (col > 0 and weights[index - 1] > 1) or
+                (col < cols - 1 and weights[index + 1] > 1))
+
+    def jump_vertical(index, step):
+        col = index % cols
+        while True:
+            previous = index
+            index += step
+            if index < 0 or index >= size:
+                return None
+            if index == goal:
+                return index
+            if weights[index] != 1:
+                return None
+            if mixed and near_weighted(index):
+                return index
+            if col > 0 and weights[index - 1] == 1 and weights[previous - 1] != 1:
+                return index
+            if col < cols - 1 and weights[index + 1] == 1 and weights[previous + 1] != 1:
+                return index
+
+    def jump_horizontal(index, step):
+        row_start = index - index % cols
+        row_end = row_start + cols
+        while True:
+            index += step
+            if index < row_start or index >= row_end:
+                return None
+            if index == goal:
+                return index
+            if weights[index] != 1:
+                return None
+            if mixed and near_weighted(index):
+                return index
+            if jump_vertical(index, -cols) is not None or jump_vertical(index, cols) is not None:
+                return index
+
+    def jump(index, step, vertical):
+        return jump_vertical(index, step) if vertical else jump_horizontal(index, step)
+
+    def successors(current, direction):
+        weight = weights[current]
+        if direction is None or weight != 1 or (mixed and near_weighted(current)):
+            found = []
+            for neighbor in _neighbors(current, cols, size):
+                neighbor_weight = weights[neighbor]
+                if not neighbor_weight:
+                    continue
+                if neighbor_weight != 1 or weight != 1:
+                    found.append((neighbor, None))
+                else:
+                    move = (neighbor - current, abs(neighbor - current) == cols)
+                    target = jump(current, *move)
+                    if target is not None:
+                        found.append((target, move))
+            return found
+
+        step, vertical = direction
+        if not vertical:
+            moves = [direction, (-cols, True), (cols, True)]
+        else:
+            moves = [direction]
+            col = current % cols
+            for side in (-1, 1):
+                if 0 <= col + side < cols and weights[current + side] == 1 and weights[current - step + side] != 1:
+                    moves.append((side, False))
+        found = []
+        for move in moves:
+            target = jump(current, *move)
+            if target is not None:
+                found.append((target, move))
+        return found
+
+    count = 0
+    open_set = [(h(start), count, start)]
+    g_score = {start: 0}
+    came_from = {}
+    directions = {start: None}
+    closed = set()
+    expanded = 0
+    max_open = 1
+    stale = 0
+
+    while open_set:
+        current = heapq.heappop(open_set)[2]
+        if current in closed:
+            stale += 1
+            continue
+        if current == goal:
+            path = _expand_jumps(came_from, start, goal, cols)
+            cost = sum(weights[index] for index in path[1:])
+            return SearchResult(path, cost, expanded, max_open, count + 1, expanded + stale + 1, stale)
+        closed.add(current)
+        expanded += 1
+
+        current_g = g_score[current]
+        current_row, current_col = divmod(current, cols)
+        for target, direction in successors(current, directions[current]):
+            if target in closed:
+                continue
+            row, col = divmod(target, cols)
+            distance = abs(row - current_row) + abs(col - current_col)
+            temp_g_score = current_g + distance - 1 + weights[target]
+            if temp_g_score < g_score.get(target, INF):
+                came_from[target] = current
+                g_score[target] = temp_g_score
+                directions[target] = direction
+                count += 1
+                heapq.heappush(open_set, (temp_g_score + h(target), count, target))
+                if len(open_set) > max_open:
+                    max_open = len(open_set)
+                if trace is not None:
+                    trace.append(target << 3 | TRACE_OPEN)
+        if trace is not None:
+            trace.append(current << 3 | TRACE_CLOSE)
+
+    return SearchResult([], None, expanded, max_open, count + 1, expanded + stale, stale)
+
+def _bidirectional(weights, cols, start, goal, trace, use_heuristic):
+    # Grows one frontier from start and one from goal. Entering a cell costs its
+    # weight, so the backward search charges a cell's weight when stepping *out*
+    # of it towards goal. With the heuristic on, both sides use the averaged
+    # potential p(x) = (h_goal(x) - h_start(x)) / 2 (and -p(x) backwards), which
+    # keeps them consistent with each other. The search stops once the two
+    # frontier minima can no longer beat the best meeting cost found so far.
+    early = _check_endpoints(weights, start, goal)
+    if early:
+        return early
+
+    size = len(weights)
+    start_row, start_col = divmod(start, cols)
+    goal_row, goal_col = divmod(goal, cols)
+    def potential(index):
+        if not use_heuristic:
+            return 0
+        row, col = divmod(index, cols)
+        return (abs(row - goal_row) + abs(col - goal_col) - abs(row - start_row) - abs(col - start_col)) / 2
+
+    dist = ({start: 0}, {goal: 0})
+    links = ({}, {})
+    closed = (set(), set())
+    open_sets = ([(potential(start), 0, start)], [(-potential(goal), 0, goal)])
+    signs = (1, -1)
+    events = ((TRACE_OPEN, TRACE_CLOSE), (TRACE_OPEN_REVERSE, TRACE_CLOSE_REVERSE))
+    count = 0
+    best_cost = INF
+    meeting = None
+    expanded = 0
+    max_open = 2
+    stale = 0
+
+    while True:
+        for side in (0, 1):
+            open_set = open_sets[side]
+            while open_set and open_set[0][2] in closed[side]:
+                heapq.heappop(open_set)
+                stale += 1
+        if not open_sets[0] or not open_sets[1]:
+            break
+        if open_sets[0][0][0] + open_sets[1][0][0] >= best_cost:
+            break
+
+        side = 0 if len(open_sets[0]) <= len(open_sets[1]) else 1
+        other = 1 - side
+        current = heapq.heappop(open_sets[side])[2]
+        closed[side].add(current)
+        expanded += 1
+
+        current_dist = dist[side][current]
+        # Forward steps pay for the cell entered, backward steps for the cell left.
+        exit_cost = weights[current] if side else 0
+        for neighbor in _neighbors(current, cols, size):
+            weight = weights[neighbor]
+            if not weight or neighbor in closed[side]:
+                continue
+            distance = current_dist + (exit_cost or weight)
+            if distance < dist[side].get(neighbor, INF):
+                dist[side][neighbor] = distance
+                links[side][neighbor] = current
+                count += 1
+                heapq.heappush(open_sets[side], (distance + signs[side] * potential(neighbor), count, neighbor))
+                if neighbor in dist[other] and distance + dist[other][neighbor] < best_cost:
+                    best_cost = distance + dist[other][neighbor]
+                    meeting = neighbor
+                if trace is not None:
+                    trace.append(neighbor << 3 | events[side][0])
+        if len(open_sets[0]) + len(open_sets[1]) > max_open:
+            max_open = len(open_sets[0]) + len(open_sets[1])
+        if trace is not None:
+            trace.append(current << 3 | events[side][1])
+
+    pushes, pops = count + 2, expanded + stale
+    if meeting is None:
+        return SearchResult([], None, expanded, max_open, pushes, pops, stale)
+
+    path = [meeting]
+    while path[-1] != start:
+        path.append(links[0][path[-1]])
+    path.reverse()
+    while path[-1] != goal:
+        path.append(links[1][path[-1]])
+    return SearchResult(path, best_cost, expanded, max_open, pushes, pops, stale)
+
+def bidirectional_a_star(weights, cols, start, goal, trace=None):
+    return _bidirectional(weights, cols, start, goal, trace, True)
+
+def bidirectional_dijkstra(weights, cols, start, goal, trace=None):
+    return _bidirectional(weights, cols, start, goal, trace, False)
+
+SOLVERS = {
+    "astar": a_star,
+    "jps": jps,
+    "dijkstra": dijkstra,
+    "bi_astar": bidirectional_a_star,
+    "bi_dijkstra": bidirectional_dijkstra,
+    "bfs": bfs,
+    "dfs": dfs,
+}
+
+def distance_table(weights, cols, source, reverse=False):
+    # Single-source Dijkstra over the whole grid. Returns the cost from source
+    # to every cell, or with reverse=True the cost from every cell to source.
+    # Unreachable cells and walls are left at INF.
+    size = len(weights)
+    dist = array('d', [INF]) * size
+    if not weights[source]:
+        return dist
+    dist[source] = 0
+    open_set = [(0, source)]
+    while open_set:
+        current_dist, current = heapq.heappop(open_set)
+        if current_dist > dist[current]:
+            continue
+        exit_cost = weights[current] if reverse else 0
+        for neighbor in _neighbors(current, cols, size):
+            weight = weights[neighbor]
+            if not weight:
+                continue
+            distance = current_dist + (exit_cost or weight)
+            if distance < dist[neighbor]:
+                dist[neighbor] = distance
+                heapq.heappush(open_set, (distance, neighbor))
+    return dist
+
+def solve(algorithm, weights, cols, start, goal, trace=None, **options):
+    if algorithm not in SOLVERS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    return SOLVERS[algorithm](weights, cols, start, goal, trace, **options)
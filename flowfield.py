@@ -0,0 +1,147 @@
+import heapq
+from array import array
+from engine import INF
+
+# Flow field toward one goal: a single reverse Dijkstra gives every cell its
+# cost to the goal and the neighbour to step to next, so any number of agents
+# can read their path in O(path length) instead of running a search each.
+# Both fields are flat arrays indexed like the weights buffer: dist holds
+# doubles (INF where the goal can't be reached) and step one direction byte
+# per cell (NO_STEP at the goal, walls and unreachable cells).
+#
+# Cells that change are repaired incrementally. A cell getting cheaper is
+# pushed back into the search with its new cost. A cell getting dearer, or
+# becoming a wall, only invalidates the cells whose next steps run into it;
+# those are reseeded from their valid neighbours and the search repairs just
+# that region.
+
+UP, DOWN, LEFT, RIGHT = range(4)
+NO_STEP = 255
+
+class FlowField:
+    # Reads weights live (engine.py); report edits through update_cells(). A
+    # copy of the weights it was built on tells which way each cell changed.
+    def __init__(self, weights, cols, goal):
+        self.weights = weights
+        self.cols = cols
+        self.size = len(weights)
+        self.goal = goal
+        self.offsets = (-cols, cols, -1, 1)
+        self.expanded = 0
+        self.rebuild()
+
+    def rebuild(self):
+        self.known = bytearray(self.weights)
+        self.dist = array('d', [INF]) * self.size
+        self.step = array('B', [NO_STEP]) * self.size
+        if self.known[self.goal]:
+            self.dist[self.goal] = 0
+            self._propagate([(0, self.goal)])
+
+    def _neighbors(self, index):
+        # (neighbour, direction from the neighbour back to index)
+        cols = self.cols
+        if index >= cols: yield index - cols, DOWN
+        if index + cols < self.size: yield index + cols, UP
+        col = index % cols
+        if col > 0: yield index - 1, RIGHT
+        if col < cols - 1: yield index + 1, LEFT
+
+    def _propagate(self, open_set):
+        # Dijkstra from the seeded cells: moving from a neighbour into current
+        # costs current's weight.
+        heapq.heapify(open_set)
+        weights, dist, step = self.known, self.dist, self.step
+        changed = set()
+        while open_set:
+            current_dist, current = heapq.heappop(open_set)
+            if current_dist > dist[current]:
+                continue
+            self.expanded += 1
+            changed.add(current)
+            distance = current_dist + weights[current]
+            for neighbor, direction in self._neighbors(current):
+                if weights[neighbor] and distance < dist[neighbor]:
+                    dist[neighbor] = distance
+                    step[neighbor] = direction
+                    heapq.heappush(open_set, (distance, neighbor))
+        return changed
+
+    def _best_step(self, index):
+        # (cost, direction) through the cheapest neighbour with a known cost.
+        best, best_direction = INF, NO_STEP
+        weights, dist = self.known, self.dist
+        for neighbor, direction in self._neighbors(index):
+            cost = dist[neighbor] + weights[neighbor]
+            if weights[neighbor] and cost < best:
+                best = cost
+                # direction leads from neighbor to index; flip it.
+                best_direction = direction ^ 1
+        return best, best_direction
+
+    def _upstream(self, index):
+        # The cells whose next steps lead into index, at any distance.
+        step = self.step
+        found = []
+        stack = [index]
+        while stack:
+            current = stack.pop()
+            for neighbor, direction in self._neighbors(current):
+                if step[neighbor] == direction:
+                    found.append(neighbor)
+                    stack.append(neighbor)
+        return found
+
+    def update_cells(self, indices):
+        # Returns the cells whose cost or step may have changed.
+        weights, known, dist, step = self.weights, self.known, self.dist, self.step
+        if not weights[self.goal]:
+            self.rebuild()
+            return set(range(self.size))
+
+        cheaper = []
+        invalid = set()
+        for index in indices:
+            old, new = known[index], weights[index]
+            if old == new:
+                continue
+            if new and (not old or new < old):
+                cheaper.append(index)
+            elif dist[index] < INF:
+                invalid.update(self._upstream(index))
+                if not new:
+                    invalid.add(index)
+        for index in indices:
+            known[index] = weights[index]
+
+        for index in invalid:
+            dist[index] = INF
+            step[index] = NO_STEP
+        seeds = []
+        for index in invalid.union(cheaper):
+            if not known[index]:
+                continue
+            if index == self.goal:
+                cost, direction = 0, NO_STEP
+            else:
+                cost, direction = self._best_step(index)
+            if cost < dist[index]:
+                dist[index], step[index] = cost, direction
+            if dist[index] < INF:
+                seeds.append((dist[index], index))
+        return self._propagate(seeds) | invalid
+
+    def next_cell(self, index):
+        direction = self.step[index]
+        return None if direction == NO_STEP else index + self.offsets[direction]
+
+    def path(self, start):
+        # Cells from start to the goal following the field; [] if the goal
+        # can't be reached from start.
+        if self.dist[start] == INF:
+            return []
+        path = [start]
+        step, offsets = self.step, self.offsets
+        while path[-1] != self.goal:
+            path.append(path[-1] + offsets[step[path[-1]]])
+        return path
@@ -0,0 +1,128 @@
+from array import array
+
+# Alternative open-set structures for the weighted solvers in engine.py. The
+# default, "heap", is not in here: the solvers run it as inline heapq loops,
+# which avoid a method call per push and pop. The others all expose the same
+# small interface:
+#
+#   push(item, key)  queue item with priority key, or lower its key if the
+#                    structure supports decrease-key
+#   pop()            remove and return the item with the lowest key
+#   len(frontier)    number of queued entries
+#
+# Cells are ints in range(size). BucketFrontier, like the heapq default, never
+# updates an entry in place: a cell whose key improves is pushed again and the old
+# entry is popped later as stale, so callers must skip closed cells.
+# IndexedHeap does a real decrease-key and never yields stale entries.
+
+class BucketFrontier:
+    # Dial's algorithm: a circular array of buckets indexed by integer key.
+    # Keys must be integers, and every key pushed must lie within max_step of
+    # the lowest key still queued. Dijkstra and A* with a consistent heuristic
+    # satisfy that with max_step = 2 * the largest cell weight, so push and
+    # pop are O(1) amortised.
+    def __init__(self, size, max_step):
+        self.width = max_step + 1
+        self.buckets = [[] for _ in range(self.width)]
+        self.current = None
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def push(self, item, key):
+        if self.current is None or key < self.current:
+            self.current = key
+        self.buckets[key % self.width].append(item)
+        self.length += 1
+
+    def pop(self):
+        if not self.length:
+            raise IndexError("pop from empty frontier")
+        buckets, width = self.buckets, self.width
+        while not buckets[self.current % width]:
+            self.current += 1
+        self.length -= 1
+        return buckets[self.current % width].pop()
+
+class IndexedHeap:
+    # Binary heap with a position index per cell, so lowering the key of a
+    # queued cell sifts it up in place instead of adding a duplicate. Ties are
+    # broken by insertion order, like the heapq default.
+    def __init__(self, size, max_step):
+        self.heap = []
+        self.priority = {}
+        self.position = array('i', [-1]) * size
+        self.count = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def _sift_up(self, index):
+        heap, position, priority = self.heap, self.position, self.priority
+        item = heap[index]
+        entry = priority[item]
+        while index:
+            parent = (index - 1) >> 1
+            parent_item = heap[parent]
+            if entry >= priority[parent_item]:
+                break
+            heap[index] = parent_item
+            position[parent_item] = index
+            index = parent
+        heap[index] = item
+        position[item] = index
+
+    def _sift_down(self, index):
+        heap, position, priority = self.heap, self.position, self.priority
+        length = len(heap)
+        item = heap[index]
+        entry = priority[item]
+        while True:
+            child = 2 * index + 1
+            if child >= length:
+                break
+            child_item = heap[child]
+            child_entry = priority[child_item]
+            if child + 1 < length:
+                right_entry = priority[heap[child + 1]]
+                if right_entry < child_entry:
+                    child += 1
+                    child_item, child_entry = heap[child], right_entry
+            if entry <= child_entry:
+                break
+            heap[index] = child_item
+            position[child_item] = index
+            index = child
+        heap[index] = item
+        position[item] = index
+
+    def push(self, item, key):
+        index = self.position[item]
+        if index < 0:
+            self.count += 1
+            self.priority[item] = (key, self.count)
+            self.heap.append(item)
+            self._sift_up(len(self.heap) - 1)
+        elif key < self.priority[item][0]:
+            self.priority[item] = (key, self.priority[item][1])
+            self._sift_up(index)
+
+    def pop(self):
+        heap = self.heap
+        item = heap[0]
+        last = heap.pop()
+        self.position[item] = -1
+        if heap:
+            heap[0] = last
+            self._sift_down(0)
+        del self.priority[item]
+        return item
+
+FRONTIERS = {
+    "bucket": BucketFrontier,
+    "indexed": IndexedHeap,
+}
+
+# Every value the solvers' frontier argument accepts.
+FRONTIER_NAMES = ["heap"] + list(FRONTIERS)
@@ -1,35 +1,196 @@
-import pygame
-from config import (GRID_SIZE, CELL_SIZE, GRID_WIDTH, GRID_HEIGHT, 
-                    GRID_TOP_LEFT_X, GRID_TOP_LEFT_Y, NODE_COLORS, NODE_WEIGHTS)
+import hashlib
+from array import array
+from viewport import Viewport
+from config import (GRID_SIZE, COLOR_BLACK, COLOR_GRAY_LIGHT, LOD_CELL_SIZE, GRID_RENDERER, GRID_LINE_MIN_SIZE,
+                    NODE_COLORS, NODE_WEIGHTS, NODE_TYPES, NODE_TYPE_CODES)
+
+# pygame is imported inside the drawing methods only, so storage, the maze
+# generators and the other headless tools can use the grid without it.
+
+INF = float('inf')
+
+def pack_color(color):
+    r, g, b = color[:3]
+    return r | (g << 8) | (b << 16)
+
+def unpack_color(value):
+    return (value & 0xFF, (value >> 8) & 0xFF, (value >> 16) & 0xFF)
+
+def _weight_code(node_type):
+    weight = NODE_WEIGHTS.get(node_type, 1)
+    return 0 if weight == INF else int(weight)
+
+TYPE_WEIGHTS = [_weight_code(node_type) for node_type in NODE_TYPES]
+TYPE_COLORS = [pack_color(NODE_COLORS[node_type]) for node_type in NODE_TYPES]
+# Translation table for bytes.translate: type code -> weight code.
+WEIGHT_TABLE = bytes(TYPE_WEIGHTS) + bytes(256 - len(TYPE_WEIGHTS))
+AIR_CODE = NODE_TYPE_CODES["AIR"]
+LINE_OVERLAY_KEY = (255, 0, 255)
+
+AIR_ROW_FILL = bytes([AIR_CODE])
+
+def row_hash(row, codes):
+    # 64-bit hash of one grid row's type codes, salted with the row number.
+    # The grid's content hash XORs these together, so a bulk load hashes each
+    # row in C as it copies it and an edit only rehashes its own row. An
+    # all-AIR row hashes to 0, so an empty grid hashes to 0 whatever its size.
+    if not codes.strip(AIR_ROW_FILL):
+        return 0
+    digest = hashlib.blake2b(codes, digest_size=8, salt=row.to_bytes(16, "little")).digest()
+    return int.from_bytes(digest, "little")
 
 class Node:
-    def __init__(self, row, col):
-        self.row = row
-        self.col = col
-        self.x = GRID_TOP_LEFT_X + col * CELL_SIZE
-        self.y = GRID_TOP_LEFT_Y + row * CELL_SIZE
-        self.node_type = "AIR"
-        self.color = NODE_COLORS["DEFAULT"]
-        self.weight = NODE_WEIGHTS["AIR"]
-        self.is_wall = False
-        self.neighbors = []
-        self.reset_path_vars()
+    # A thin view over one cell of the grid's flat arrays. Views are created on
+    # demand and compare equal when they point at the same cell.
+    __slots__ = ("grid", "index")
+
+    def __init__(self, grid, index):
+        self.grid = grid
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, Node) and self.index == other.index and self.grid is other.grid
+
+    def __hash__(self):
+        return self.index
+
+    def __repr__(self):
+        return f"Node({self.row}, {self.col})"
+
+    @property
+    def row(self):
+        return self.index // self.grid.cols
+
+    @property
+    def col(self):
+        return self.index % self.grid.cols
+
+    @property
+    def x(self):
+        return self.grid.view.cell_position(self.row, self.col)[0]
+
+    @property
+    def y(self):
+        return self.grid.view.cell_position(self.row, self.col)[1]
+
+    @property
+    def node_type(self):
+        return NODE_TYPES[self.grid.types[self.index]]
+
+    @property
+    def color(self):
+        return unpack_color(self.grid.colors[self.index])
+
+    @color.setter
+    def color(self, color):
+        self.grid.paint(self.index, pack_color(color))
+
+    @property
+    def weight(self):
+        return self.grid.weights[self.index] or INF
+
+    @property
+    def is_wall(self):
+        return not self.grid.weights[self.index]
+
+    @property
+    def neighbors(self):
+        grid = self.grid
+        return [Node(grid, i) for i in grid.neighbor_indices(self.index)]
+
+    @property
+    def g_score(self):
+        grid = self.grid
+        return grid.g_scores[self.index] if grid.stamps[self.index] == grid.epoch else INF
+
+    @g_score.setter
+    def g_score(self, value):
+        self.grid.path_state(self.index)
+        self.grid.g_scores[self.index] = value
+
+    def _get(self, name, default):
+        grid = self.grid
+        if grid.stamps[self.index] != grid.epoch:
+            return default
+        return grid.path_vars.get(self.index, {}).get(name, default)
+
+    @property
+    def f_score(self):
+        return self._get("f_score", INF)
+
+    @f_score.setter
+    def f_score(self, value):
+        self.grid.path_state(self.index)["f_score"] = value
+
+    @property
+    def came_from(self):
+        return self._get("came_from", None)
+
+    @came_from.setter
+    def came_from(self, value):
+        self.grid.path_state(self.index)["came_from"] = value
+
+    @property
+    def is_open(self):
+        return self._get("is_open", False)
+
+    @is_open.setter
+    def is_open(self, value):
+        self.grid.path_state(self.index)["is_open"] = value
+
+    @property
+    def is_closed(self):
+        return self._get("is_closed", False)
+
+    @is_closed.setter
+    def is_closed(self, value):
+        self.grid.path_state(self.index)["is_closed"] = value
 
     def reset_path_vars(self):
-        self.g_score = float('inf')
-        self.f_score = float('inf')
-        self.came_from = None
-        self.is_open = False
-        self.is_closed = False
+        self.grid.stamps[self.index] = 0
 
     def draw(self, screen):
-        pygame.draw.rect(screen, self.color, (self.x, self.y, CELL_SIZE, CELL_SIZE))
+        return self.grid.draw_cell(screen, self.index)
 
     def set_type(self, node_type):
-        self.node_type = node_type
-        self.color = NODE_COLORS[node_type]
-        self.weight = NODE_WEIGHTS.get(node_type, 1)
-        self.is_wall = (node_type == "WALL")
+        self.grid.set_cell_type(self.index, node_type)
+
+class GridRow:
+    __slots__ = ("grid", "row")
+
+    def __init__(self, grid, row):
+        self.grid = grid
+        self.row = row
+
+    def __len__(self):
+        return self.grid.cols
+
+    def __getitem__(self, col):
+        if not 0 <= col < self.grid.cols:
+            raise IndexError(col)
+        return Node(self.grid, self.row * self.grid.cols + col)
+
+    def __iter__(self):
+        start = self.row * self.grid.cols
+        return (Node(self.grid, i) for i in range(start, start + self.grid.cols))
+
+class GridRows:
+    # Keeps the old grid[row][col] access pattern working on top of the arrays.
+    __slots__ = ("grid",)
+
+    def __init__(self, grid):
+        self.grid = grid
+
+    def __len__(self):
+        return self.grid.rows
+
+    def __getitem__(self, row):
+        if not 0 <= row < self.grid.rows:
+            raise IndexError(row)
+        return GridRow(self.grid, row)
+
+    def __iter__(self):
+        return (GridRow(self.grid, row) for row in range(self.grid.rows))
 
 class Grid:
     _instance = None
@@ -37,52 +198,279 @@ class Grid:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(Grid, cls).__new__(cls)
+            cls._instance.listeners = []
+            cls._instance.version = 0
+            cls._instance.view = Viewport()
+            cls._instance._lines = None
             cls._instance.init_grid()
         return cls._instance
 
-    def init_grid(self):
-        self.grid = [[Node(row, col) for col in range(GRID_SIZE)] for row in range(GRID_SIZE)]
+    def init_grid(self, rows=GRID_SIZE, cols=GRID_SIZE):
+        self.rows = rows
+        self.cols = cols
+        self.view.fit(rows, cols)
+
+        size = rows * cols
+        self.types = array('B', bytes(size))
+        self.weights = array('B', [TYPE_WEIGHTS[AIR_CODE]]) * size
+        self.colors = array('I', [TYPE_COLORS[AIR_CODE]]) * size
+        self.g_scores = array('d', [INF]) * size
+        self.path_vars = {}
+        self.stamps = array('I', [0]) * size
+        self.epoch = 1
+        self.painted = set()
+        self.dirty = set()
+        self.full_redraw = True
+        self.drawn_view = None
+        self._surface = None
+        self.row_hashes = array('Q', bytes(8 * rows))
+        self._hash = 0
+
+        self.grid = GridRows(self)
         self.start_node = None
         self.end_node = None
-        self.update_all_neighbors()
+        self._notify(None)
+
+    def add_listener(self, listener):
+        # Listeners are called with the index of a cell whose weight changed, or
+        # with None when the whole grid was replaced or reset.
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def _notify(self, index):
+        self.version += 1
+        for listener in self.listeners:
+            listener(index)
 
     def update_all_neighbors(self):
-        for row in self.grid:
-            for node in row:
-                node.neighbors = self._get_neighbors(node)
+        # Neighbors are derived from the cell index on demand; nothing to rebuild.
+        pass
 
-    def _get_neighbors(self, node):
+    def neighbor_indices(self, index):
+        cols = self.cols
+        row, col = divmod(index, cols)
         neighbors = []
-        if node.row > 0: neighbors.append(self.grid[node.row - 1][node.col])
-        if node.row < GRID_SIZE - 1: neighbors.append(self.grid[node.row + 1][node.col])
-        if node.col > 0: neighbors.append(self.grid[node.row][node.col - 1])
-        if node.col < GRID_SIZE - 1: neighbors.append(self.grid[node.row][node.col + 1])
+        if row > 0: neighbors.append(index - cols)
+        if row < self.rows - 1: neighbors.append(index + cols)
+        if col > 0: neighbors.append(index - 1)
+        if col < cols - 1: neighbors.append(index + 1)
         return neighbors
 
+    def _get_neighbors(self, node):
+        return node.neighbors
+
+    def node(self, row, col):
+        return Node(self, row * self.cols + col)
+
+    def content_hash(self):
+        # XOR of the row hashes, kept up to date by every write to types.
+        return self._hash
+
+    def _rehash_row(self, row, codes):
+        value = row_hash(row, codes)
+        self._hash ^= self.row_hashes[row] ^ value
+        self.row_hashes[row] = value
+
+    def set_cell_type(self, index, node_type):
+        code = NODE_TYPE_CODES[node_type]
+        old_weight = self.weights[index]
+        old_code = self.types[index]
+        self.types[index] = code
+        if code != old_code:
+            begin = index - index % self.cols
+            self._rehash_row(begin // self.cols, self.types[begin:begin + self.cols].tobytes())
+        self.weights[index] = TYPE_WEIGHTS[code]
+        self.colors[index] = TYPE_COLORS[code]
+        self.painted.discard(index)
+        self.dirty.add(index)
+        if old_weight != TYPE_WEIGHTS[code]:
+            self._notify(index)
+
+    def load_rows(self, rows, start=None, end=None):
+        # Bulk-loads type codes one grid row at a time, so generators that
+        # stream their output never need the whole grid as Python objects.
+        cols = self.cols
+        for row, codes in enumerate(rows):
+            begin = row * cols
+            codes = bytes(codes)
+            self.types[begin:begin + cols] = array('B', codes)
+            self.weights[begin:begin + cols] = array('B', codes.translate(WEIGHT_TABLE))
+            self.colors[begin:begin + cols] = array('I', map(TYPE_COLORS.__getitem__, codes))
+            self._rehash_row(row, codes)
+
+        self.next_epoch()
+        self.painted.clear()
+        self.start_node = None if start is None else Node(self, start)
+        self.end_node = None if end is None else Node(self, end)
+        self.dirty.clear()
+        self.full_redraw = True
+        self._notify(None)
+
+    def load_types(self, codes, start=None, end=None):
+        cols = self.cols
+        codes = memoryview(codes)
+        self.load_rows((codes[i:i + cols] for i in range(0, self.rows * cols, cols)), start, end)
+
+    def next_epoch(self):
+        # Starts a new search generation: path state stamped with an older
+        # epoch reads as unset, so this is all a reset of g/f/visited needs.
+        self.epoch += 1
+        if self.epoch > 0xFFFFFFFF:
+            self.stamps[:] = array('I', [0]) * len(self.stamps)
+            self.epoch = 1
+
+    def path_state(self, index):
+        # Per-cell dict for f_score/came_from/is_open/is_closed in the current
+        # epoch; state left over from an earlier search is dropped on first write.
+        if self.stamps[index] != self.epoch:
+            self.stamps[index] = self.epoch
+            self.g_scores[index] = INF
+            self.path_vars[index] = {}
+        return self.path_vars[index]
+
+    def clear_paint(self, index):
+        self.colors[index] = TYPE_COLORS[self.types[index]]
+        self.painted.discard(index)
+        self.dirty.add(index)
+
+    def paint(self, index, packed_color):
+        self.colors[index] = packed_color
+        self.painted.add(index)
+        self.dirty.add(index)
+
+    def rect(self):
+        # The grid panel, including the closing grid line on the right and bottom.
+        import pygame
+        view = self.view
+        return pygame.Rect(view.left, view.top, view.width + 1, view.height + 1)
+
+    def draw_cell(self, screen, index):
+        # Cells are drawn inside their grid lines, so redrawing a cell never
+        # touches the lines around it. Returns the rect drawn, or None when the
+        # cell is off screen.
+        import pygame
+        view = self.view
+        size = view.size
+        x, y = view.cell_position(*divmod(index, self.cols))
+        rect = pygame.Rect(x + 1, y + 1, size - 1, size - 1).clip(self.rect())
+        if not rect:
+            return None
+        pygame.draw.rect(screen, unpack_color(self.colors[index]), rect)
+        return rect
+
+    def cell_surface(self):
+        # A cols x rows surface that shares memory with self.colors, so every
+        # paint or type change is already in it without a separate write.
+        # self.colors is only ever updated in place (same length) while this
+        # exists, which keeps the shared buffer valid.
+        import pygame
+        if self._surface is None:
+            self._surface = pygame.image.frombuffer(self.colors, (self.cols, self.rows), "RGBX")
+        return self._surface
+
+    def _line_overlay(self, size):
+        # Transparent overlay with a grid line every `size` pixels, one cell
+        # larger than the panel so it can be shifted by the scroll offset.
+        import pygame
+        if self._lines is None or self._lines[0] != size:
+            view = self.view
+            width, height = view.width + size + 1, view.height + size + 1
+            overlay = pygame.Surface((width, height))
+            overlay.fill(LINE_OVERLAY_KEY)
+            overlay.set_colorkey(LINE_OVERLAY_KEY)
+            for x in range(0, width, size):
+                pygame.draw.line(overlay, COLOR_BLACK, (x, 0), (x, height))
+            for y in range(0, height, size):
+                pygame.draw.line(overlay, COLOR_BLACK, (0, y), (width, y))
+            self._lines = (size, overlay)
+        return self._lines[1]
+
+    def _draw_buffer(self, screen):
+        # Draws the visible part of the cell surface with one scale and one
+        # blit, plus one blit of the cached line overlay, whatever the grid
+        # size. Zoomed out past one pixel per cell, the scale samples every
+        # `step`-th cell.
+        import pygame
+        view = self.view
+        size, step = view.size, view.step
+        first_row, end_row, first_col, end_col = view.visible_cells()
+        if first_row >= end_row or first_col >= end_col:
+            return
+        area = pygame.Rect(first_col, first_row, end_col - first_col, end_row - first_row)
+        target = (-(-area.width // step) * size, -(-area.height // step) * size)
+        cells = pygame.transform.scale(self.cell_surface().subsurface(area), target)
+
+        panel = self.rect()
+        screen.set_clip(panel)
+        screen.blit(cells, view.cell_position(first_row, first_col))
+        if size >= GRID_LINE_MIN_SIZE:
+            x, y, width, height = view.grid_extent()
+            screen.set_clip(pygame.Rect(x, y, width + 1, height + 1).clip(panel))
+            screen.blit(self._line_overlay(size), (view.left - view.origin_x % size, view.top - view.origin_y % size))
+        screen.set_clip(None)
+
     def draw(self, screen):
-        for row in self.grid:
-            for node in row:
-                node.draw(screen)
-        self._draw_grid_lines(screen)
-
-    def _draw_grid_lines(self, screen):
-        for i in range(GRID_SIZE + 1):
-            pygame.draw.line(screen, (0,0,0), 
-                             (GRID_TOP_LEFT_X + i * CELL_SIZE, GRID_TOP_LEFT_Y), 
-                             (GRID_TOP_LEFT_X + i * CELL_SIZE, GRID_TOP_LEFT_Y + GRID_HEIGHT))
-            pygame.draw.line(screen, (0,0,0), 
-                             (GRID_TOP_LEFT_X, GRID_TOP_LEFT_Y + i * CELL_SIZE), 
-                             (GRID_TOP_LEFT_X + GRID_WIDTH, GRID_TOP_LEFT_Y + i * CELL_SIZE))
+        self.draw_cells(screen)
+
+    def _draws_cells_individually(self):
+        return GRID_RENDERER == "cells" and self.view.size >= LOD_CELL_SIZE
+
+    def draw_cells(self, screen):
+        # Redraws the whole grid panel; only the cells inside the viewport are
+        # drawn. In "cells" mode the grid lines are the black fill showing
+        # between inset cells.
+        import pygame
+        view = self.view
+        panel = self.rect()
+        screen.fill(COLOR_GRAY_LIGHT, panel)
+        if not self._draws_cells_individually():
+            self._draw_buffer(screen)
+        else:
+            x, y, width, height = view.grid_extent()
+            screen.fill(COLOR_BLACK, pygame.Rect(x, y, width + 1, height + 1).clip(panel))
+            first_row, end_row, first_col, end_col = view.visible_cells()
+            for row in range(first_row, end_row):
+                base = row * self.cols
+                for index in range(base + first_col, base + end_col):
+                    self.draw_cell(screen, index)
+        self.dirty.clear()
+        self.full_redraw = False
+        self.drawn_view = view.version
+
+    def draw_changes(self, screen):
+        # Draws only the visible cells changed since the last call and returns
+        # the screen rects that need updating.
+        view = self.view
+        if self.full_redraw or self.drawn_view != view.version:
+            self.draw_cells(screen)
+            return [self.rect()]
+        if not self.dirty:
+            return []
+
+        first_row, end_row, first_col, end_col = view.visible_cells()
+        visible = (end_row - first_row) * (end_col - first_col)
+        if not self._draws_cells_individually() or len(self.dirty) > visible // 4:
+            self.draw_cells(screen)
+            return [self.rect()]
+
+        rects = []
+        cols = self.cols
+        for index in self.dirty:
+            row, col = divmod(index, cols)
+            if first_row <= row < end_row and first_col <= col < end_col:
+                rect = self.draw_cell(screen, index)
+                if rect:
+                    rects.append(rect)
+        self.dirty.clear()
+        return rects
 
     def get_node_from_pos(self, pos):
-        x, y = pos
-        if not (GRID_TOP_LEFT_X <= x < GRID_TOP_LEFT_X + GRID_WIDTH and 
-                GRID_TOP_LEFT_Y <= y < GRID_TOP_LEFT_Y + GRID_HEIGHT):
+        cell = self.view.cell_at(pos)
+        if cell is None:
             return None
-        
-        col = (x - GRID_TOP_LEFT_X) // CELL_SIZE
-        row = (y - GRID_TOP_LEFT_Y) // CELL_SIZE
-        return self.grid[row][col]
+        return self.node(*cell)
 
     def set_node_type(self, node, brush_type):
         if node is None:
@@ -106,20 +494,35 @@ class Grid:
             node.set_type(brush_type)
 
     def reset_path(self):
-        for row in self.grid:
-            for node in row:
-                node.reset_path_vars()
-                if node.node_type not in ["WALL", "START", "END", "DIRT", "MUD", "TAR"]:
-                    node.set_type("AIR")
-                else:
-                    node.set_type(node.node_type)
+        # Only path state is cleared; the types and so the content hash stay.
+        # Costs O(painted cells), not O(grid): the search state expires with
+        # the epoch and only the cells a search coloured are repainted.
+        self.next_epoch()
+        painted = self.painted
+        if len(painted) > len(self.colors) // 4:
+            self.colors[:] = array('I', map(TYPE_COLORS.__getitem__, self.types))
+            self.dirty.clear()
+            self.full_redraw = True
+        else:
+            colors, types = self.colors, self.types
+            for index in painted:
+                colors[index] = TYPE_COLORS[types[index]]
+            self.dirty.update(painted)
+        self.painted = set()
 
     def full_reset(self):
+        size = self.rows * self.cols
         self.start_node = None
         self.end_node = None
-        for row in self.grid:
-            for node in row:
-                node.set_type("AIR")
-                node.reset_path_vars()
+        self.types[:] = array('B', bytes(size))
+        self.weights[:] = array('B', [TYPE_WEIGHTS[AIR_CODE]]) * size
+        self.colors[:] = array('I', [TYPE_COLORS[AIR_CODE]]) * size
+        self.next_epoch()
+        self.painted.clear()
+        self.row_hashes[:] = array('Q', bytes(8 * self.rows))
+        self._hash = 0
+        self.dirty.clear()
+        self.full_redraw = True
+        self._notify(None)
 
-grid_instance = Grid()
\ No newline at end of file
+grid_instance = Grid()
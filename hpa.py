@@ -0,0 +1,314 @@
+import heapq
+import engine
+
+# HPA* (hierarchical path-finding A*). The grid is split into square clusters
+# of cluster_size cells. Wherever two neighbouring clusters share a run of
+# open cells along their border there is an entrance: one transition (a pair
+# of facing cells) in the middle of the run, or one at each end of long runs.
+# Transition cells are the nodes of an abstract graph whose edges are
+#
+#   inter edges  the single step across a border, costing the entered cell
+#   intra edges  the cheapest path between two nodes of one cluster, found
+#                by Dijkstra restricted to that cluster, so DIRT/MUD/TAR count
+#
+# A query links start and goal into the graph, runs A* over it, then refines
+# each abstract edge back into cells with another cluster-bounded search.
+# Paths are near-optimal: within a cluster they are exact, but only entrance
+# cells can be used to cross a border.
+#
+# Cluster data is built on first use and cached, so a query only pays for the
+# clusters its search touches. Editing a cell drops the cluster it is in, plus
+# the neighbouring cluster when the cell lies on their shared border.
+
+DEFAULT_CLUSTER_SIZE = 10
+# Entrances at least this long get a transition at each end instead of one.
+LONG_ENTRANCE = 6
+
+def _bounded_dijkstra(weights, cols, source, bounds, target=None, reverse=False, trace=None):
+    # Dijkstra from source over the cells inside bounds (row0, row1, col0,
+    # col1, half-open). Returns (dist, came_from, expanded); stops early once
+    # target is closed. With reverse=True, dist[x] is the cost from x to source.
+    row0, row1, col0, col1 = bounds
+    dist = {source: 0}
+    came_from = {}
+    closed = set()
+    open_set = [(0, source)]
+    expanded = 0
+    while open_set:
+        current_dist, current = heapq.heappop(open_set)
+        if current in closed:
+            continue
+        closed.add(current)
+        if current == target:
+            break
+        expanded += 1
+        row, col = divmod(current, cols)
+        exit_cost = weights[current] if reverse else 0
+        for neighbor_row, neighbor_col in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+            if not (row0 <= neighbor_row < row1 and col0 <= neighbor_col < col1):
+                continue
+            neighbor = neighbor_row * cols + neighbor_col
+            weight = weights[neighbor]
+            if not weight or neighbor in closed:
+                continue
+            distance = current_dist + (exit_cost or weight)
+            if distance < dist.get(neighbor, engine.INF):
+                dist[neighbor] = distance
+                came_from[neighbor] = current
+                heapq.heappush(open_set, (distance, neighbor))
+                if trace is not None:
+                    trace.append(neighbor << 3 | engine.TRACE_OPEN_REVERSE)
+        if trace is not None:
+            trace.append(current << 3 | engine.TRACE_CLOSE_REVERSE)
+    return dist, came_from, expanded
+
+class Cluster:
+    __slots__ = ("bounds", "nodes", "links")
+
+    def __init__(self, bounds, nodes, links):
+        self.bounds = bounds
+        self.nodes = nodes
+        self.links = links
+
+class ClusterGraph:
+    def __init__(self, weights, cols, cluster_size=DEFAULT_CLUSTER_SIZE):
+        # Reads weights live (engine.py); report edits through invalidate_cell.
+        self.weights = weights
+        self.cols = cols
+        self.rows = len(weights) // cols if cols else 0
+        self.cluster_size = cluster_size
+        self.cluster_cols = -(-cols // cluster_size)
+        self.clusters = {}
+        self.borders = {}
+        self.builds = 0
+
+    def cluster_of(self, index):
+        row, col = divmod(index, self.cols)
+        return row // self.cluster_size * self.cluster_cols + col // self.cluster_size
+
+    def _bounds(self, cluster):
+        size = self.cluster_size
+        row0 = cluster // self.cluster_cols * size
+        col0 = cluster % self.cluster_cols * size
+        return row0, min(row0 + size, self.rows), col0, min(col0 + size, self.cols)
+
+    def _neighbor_clusters(self, cluster):
+        # (neighbouring cluster, side of this cluster it lies on)
+        row, col = divmod(cluster, self.cluster_cols)
+        cluster_rows = -(-self.rows // self.cluster_size)
+        if row > 0: yield cluster - self.cluster_cols, "up"
+        if row < cluster_rows - 1: yield cluster + self.cluster_cols, "down"
+        if col > 0: yield cluster - 1, "left"
+        if col < self.cluster_cols - 1: yield cluster + 1, "right"
+
+    def _border(self, first, second, side):
+        # Transitions (cell in first, facing cell in second) between two
+        # neighbouring clusters, where second is below or right of first;
+        # cached until an edit.
+        key = (first, second)
+        transitions = self.borders.get(key)
+        if transitions is not None:
+            return transitions
+        weights, cols = self.weights, self.cols
+        row0, row1, col0, col1 = self._bounds(first)
+        if side == "right":
+            pairs = [(row * cols + col1 - 1, row * cols + col1) for row in range(row0, row1)]
+        else:
+            pairs = [((row1 - 1) * cols + col, row1 * cols + col) for col in range(col0, col1)]
+
+        transitions = []
+        run = []
+        for a, b in pairs + [(None, None)]:
+            if a is not None and weights[a] and weights[b]:
+                run.append((a, b))
+                continue
+            if run:
+                # The cheapest pair to cross at, nearest the middle on ties,
+                # plus both ends of long runs.
+                middle = len(run) // 2
+                cheapest = min(range(len(run)), key=lambda i: (weights[run[i][0]] + weights[run[i][1]], abs(i - middle)))
+                chosen = {cheapest, 0, len(run) - 1} if len(run) >= LONG_ENTRANCE else {cheapest}
+                transitions += [run[i] for i in sorted(chosen)]
+            run = []
+        self.borders[key] = transitions
+        return transitions
+
+    def cluster(self, cluster):
+        # Nodes and outgoing edges of one cluster, built on first use.
+        record = self.clusters.get(cluster)
+        if record is not None:
+            return record
+        self.builds += 1
+        links = {}
+        for other, side in self._neighbor_clusters(cluster):
+            if side == "down" or side == "right":
+                transitions = self._border(cluster, other, side)
+            else:
+                transitions = [(b, a) for a, b in self._border(other, cluster, "down" if side == "up" else "right")]
+            for inside, outside in transitions:
+                links.setdefault(inside, []).append((outside, self.weights[outside]))
+
+        bounds = self._bounds(cluster)
+        nodes = list(links)
+        for node in nodes:
+            dist = _bounded_dijkstra(self.weights, self.cols, node, bounds)[0]
+            for other in nodes:
+                if other != node and other in dist:
+                    links[node].append((other, dist[other]))
+        record = self.clusters[cluster] = Cluster(bounds, set(nodes), links)
+        return record
+
+    def invalidate_cell(self, index):
+        cluster = self.cluster_of(index)
+        self.clusters.pop(cluster, None)
+        row, col = divmod(index, self.cols)
+        row0, row1, col0, col1 = self._bounds(cluster)
+        edges = {"up": row == row0, "down": row == row1 - 1, "left": col == col0, "right": col == col1 - 1}
+        for other, side in self._neighbor_clusters(cluster):
+            # Only a cell on the edge facing `other` can change their border.
+            if edges[side]:
+                self.borders.pop((min(cluster, other), max(cluster, other)), None)
+                self.clusters.pop(other, None)
+
+    def invalidate(self):
+        self.clusters.clear()
+        self.borders.clear()
+
+    def _refine(self, current, following, trace):
+        # Cells after current up to and including following, plus the number
+        # of cells expanded to find them.
+        if self.cluster_of(current) != self.cluster_of(following):
+            return [following], 0
+        bounds = self.cluster(self.cluster_of(current)).bounds
+        came_from, expanded = _bounded_dijkstra(self.weights, self.cols, current, bounds, following, trace=trace)[1:]
+        cells = [following]
+        while cells[-1] != current:
+            cells.append(came_from[cells[-1]])
+        cells.pop()
+        cells.reverse()
+        return cells, expanded
+
+    def search(self, start, goal, trace=None):
+        # Returns an engine.SearchResult for the refined path. The trace shows
+        # the abstract search as TRACE_OPEN/TRACE_CLOSE on transition cells and
+        # the refinement as TRACE_OPEN_REVERSE/TRACE_CLOSE_REVERSE.
+        weights, cols = self.weights, self.cols
+        early = engine._check_endpoints(weights, start, goal)
+        if early is not None:
+            return early
+
+        # Start and goal join the abstract graph through the nodes of their
+        # own clusters (and directly, when they share one).
+        start_cluster = self.cluster(self.cluster_of(start))
+        goal_cluster = self.cluster(self.cluster_of(goal))
+        start_dist = _bounded_dijkstra(weights, cols, start, start_cluster.bounds)[0]
+        goal_dist = _bounded_dijkstra(weights, cols, goal, goal_cluster.bounds, reverse=True)[0]
+        start_links = [(node, start_dist[node]) for node in start_cluster.nodes if node in start_dist]
+        start_links += start_cluster.links.get(start, [])
+        if goal in start_dist:
+            start_links.append((goal, start_dist[goal]))
+
+        h = engine.manhattan(cols, goal)
+        g_score = {start: 0}
+        came_from = {}
+        closed = set()
+        # Ties on f go to the entry nearer the goal, which keeps the search
+        # from flooding open areas where many routes cost the same.
+        open_set = [(h(start), h(start), 0, start)]
+        count = 0
+        expanded = stale = 0
+        max_open = 1
+        while open_set:
+            current = heapq.heappop(open_set)[3]
+            if current in closed:
+                stale += 1
+                continue
+            if current == goal:
+                break
+            closed.add(current)
+            expanded += 1
+
+            if current == start:
+                edges = start_links
+            else:
+                edges = self.cluster(self.cluster_of(current)).links.get(current, [])
+                if current in goal_dist:
+                    edges = edges + [(goal, goal_dist[current])]
+            current_g = g_score[current]
+            for neighbor, cost in edges:
+                if neighbor in closed:
+                    continue
+                temp_g_score = current_g + cost
+                if temp_g_score < g_score.get(neighbor, engine.INF):
+                    g_score[neighbor] = temp_g_score
+                    came_from[neighbor] = current
+                    count += 1
+                    h_score = h(neighbor)
+                    heapq.heappush(open_set, (temp_g_score + h_score, h_score, count, neighbor))
+                    if len(open_set) > max_open:
+                        max_open = len(open_set)
+                    if trace is not None:
+                        trace.append(neighbor << 3 | engine.TRACE_OPEN)
+            if trace is not None:
+                trace.append(current << 3 | engine.TRACE_CLOSE)
+        else:
+            return engine.SearchResult([], None, expanded, max_open, count + 1, expanded + stale, stale)
+
+        abstract = [goal]
+        while abstract[-1] != start:
+            abstract.append(came_from[abstract[-1]])
+        abstract.reverse()
+
+        pops = expanded + stale + 1
+        path = [start]
+        for current, following in zip(abstract, abstract[1:]):
+            cells, refined = self._refine(current, following, trace)
+            path += cells
+            expanded += refined
+        cost = sum(weights[index] for index in path[1:])
+        return engine.SearchResult(path, cost, expanded, max_open, count + 1, pops, stale)
+
+class HierarchyCache:
+    # Keeps one ClusterGraph for the visualizer's grid. Register cell_changed
+    # as a grid listener: a single edited cell drops only the clusters it can
+    # affect, a bulk change (None) drops the whole graph.
+    #
+    # Searches run on a worker thread get a snapshot() instead: a graph over a
+    # copy of the weights, seeded with the clusters built so far. The worker
+    # extends only its own copy; the clusters it built are taken back on the
+    # main thread by the next snapshot(), unless a cell changed in between.
+    def __init__(self, cluster_size=DEFAULT_CLUSTER_SIZE):
+        self.cluster_size = cluster_size
+        self.graph = None
+        self.generation = 0
+        self.lent = None
+
+    def get(self, weights, cols):
+        graph = self.graph
+        if graph is None or graph.weights is not weights or graph.cols != cols:
+            graph = self.graph = ClusterGraph(weights, cols, self.cluster_size)
+            self.generation += 1
+        return graph
+
+    def snapshot(self, weights, cols):
+        graph = self.get(weights, cols)
+        if self.lent is not None:
+            lent, generation = self.lent
+            if generation == self.generation:
+                graph.clusters.update(lent.clusters)
+                graph.borders.update(lent.borders)
+                graph.builds += lent.builds
+        copy = ClusterGraph(bytes(weights), cols, self.cluster_size)
+        copy.clusters = dict(graph.clusters)
+        copy.borders = dict(graph.borders)
+        self.lent = (copy, self.generation)
+        return copy
+
+    def cell_changed(self, index):
+        self.generation += 1
+        if self.graph is None:
+            return
+        if index is None:
+            self.graph = None
+        else:
+            self.graph.invalidate_cell(index)
@@ -0,0 +1,140 @@
+import heapq
+from engine import INF, SearchResult, _neighbors
+
+class DStarLite:
+    # Incremental planner (D* Lite) over the same flat weights buffer the
+    # engine solvers use. It searches backwards from goal and keeps its g/rhs
+    # values between calls, so after cells change weight or the start moves
+    # only the affected part of the search is repaired.
+    #
+    # Reads weights live (engine.py); report edits through update_cells().
+
+    def __init__(self, weights, cols, start, goal):
+        self.weights = weights
+        self.cols = cols
+        self.size = len(weights)
+        self.start = start
+        self.goal = goal
+        self.last_start = start
+        self.km = 0
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.queue = []
+        self.queued = {}
+        self.count = 0
+        self.expanded = 0
+        self._push(goal)
+
+    def _h(self, index):
+        row, col = divmod(index, self.cols)
+        start_row, start_col = divmod(self.start, self.cols)
+        return abs(row - start_row) + abs(col - start_col)
+
+    def _key(self, index):
+        best = min(self.g.get(index, INF), self.rhs.get(index, INF))
+        return (best + self._h(index) + self.km, best)
+
+    def _push(self, index):
+        key = self._key(index)
+        self.queued[index] = key
+        self.count += 1
+        heapq.heappush(self.queue, (key, self.count, index))
+
+    def _top(self):
+        # Drops entries whose key was superseded or removed.
+        while self.queue:
+            key, _, index = self.queue[0]
+            if self.queued.get(index) == key:
+                return key, index
+            heapq.heappop(self.queue)
+        return (INF, INF), None
+
+    def _best_successor_cost(self, index):
+        best = INF
+        for neighbor in _neighbors(index, self.cols, self.size):
+            weight = self.weights[neighbor]
+            if weight:
+                cost = weight + self.g.get(neighbor, INF)
+                if cost < best:
+                    best = cost
+        return best
+
+    def _update_vertex(self, index):
+        if index != self.goal:
+            self.rhs[index] = self._best_successor_cost(index)
+        self.queued.pop(index, None)
+        if self.g.get(index, INF) != self.rhs.get(index, INF):
+            self._push(index)
+
+    def _predecessors(self, index):
+        return [n for n in _neighbors(index, self.cols, self.size) if self.weights[n]]
+
+    def compute(self):
+        expanded = 0
+        while True:
+            top_key, index = self._top()
+            start_g = self.g.get(self.start, INF)
+            start_rhs = self.rhs.get(self.start, INF)
+            if index is None or (top_key >= self._key(self.start) and start_g == start_rhs):
+                break
+
+            new_key = self._key(index)
+            if top_key < new_key:
+                self._push(index)
+                continue
+
+            heapq.heappop(self.queue)
+            del self.queued[index]
+            expanded += 1
+            g = self.g.get(index, INF)
+            rhs = self.rhs.get(index, INF)
+            if g > rhs:
+                self.g[index] = rhs
+                for predecessor in self._predecessors(index):
+                    self._update_vertex(predecessor)
+            else:
+                self.g[index] = INF
+                self._update_vertex(index)
+                for predecessor in self._predecessors(index):
+                    self._update_vertex(predecessor)
+
+        self.expanded = expanded
+        return self.result()
+
+    def result(self):
+        if not self.weights[self.start] or self.g.get(self.start, INF) == INF:
+            return SearchResult([], None, self.expanded)
+
+        path = [self.start]
+        visited = {self.start}
+        while path[-1] != self.goal:
+            current = path[-1]
+            best, best_cost = None, INF
+            for neighbor in _neighbors(current, self.cols, self.size):
+                weight = self.weights[neighbor]
+                if weight:
+                    cost = weight + self.g.get(neighbor, INF)
+                    if cost < best_cost:
+                        best, best_cost = neighbor, cost
+            if best is None or best in visited:
+                return SearchResult([], None, self.expanded)
+            path.append(best)
+            visited.add(best)
+
+        cost = sum(self.weights[index] for index in path[1:])
+        return SearchResult(path, cost, self.expanded)
+
+    def update_cells(self, indices):
+        # Entering a cell costs its weight, so a change to a cell alters the
+        # edges from each of its neighbors into it.
+        for index in indices:
+            for neighbor in _neighbors(index, self.cols, self.size):
+                self._update_vertex(neighbor)
+            self._update_vertex(index)
+
+    def move_start(self, start):
+        if start == self.start:
+            return
+        self.start = start
+        self.km += self._h(self.last_start)
+        self.last_start = start
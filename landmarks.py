@@ -0,0 +1,90 @@
+import random
+from array import array
+import engine
+
+# ALT (A*, Landmarks, Triangle inequality) heuristics. A handful of landmark
+# cells get full distance tables in both directions; for any cell x and goal t,
+#   d(x, t) >= d(L, t) - d(L, x)   and   d(x, t) >= d(x, L) - d(t, L)
+# for every landmark L. The best of those bounds and Manhattan distance is a
+# consistent heuristic that, unlike Manhattan alone, accounts for terrain.
+#
+# Tables are stored as unsigned 32-bit ints (4 bytes per cell per table, two
+# tables per landmark), with UNREACHABLE for cells in another component.
+
+DEFAULT_LANDMARKS = 4
+UNREACHABLE = 0xFFFFFFFF
+
+def _to_table(distances):
+    return array('I', (UNREACHABLE if d == engine.INF else int(d) for d in distances))
+
+class LandmarkIndex:
+    def __init__(self, weights, cols, count=DEFAULT_LANDMARKS, seed=0):
+        self.cols = cols
+        self.landmarks = []
+        self.from_tables = []
+        self.to_tables = []
+
+        rng = random.Random(seed)
+        landmark = next((index for index in (rng.randrange(len(weights)) for _ in range(100)) if weights[index]), None)
+        if landmark is None:
+            landmark = next((index for index in range(len(weights)) if weights[index]), None)
+        if landmark is None:
+            return
+
+        # Farthest-point selection: each new landmark is the cell furthest from
+        # all the landmarks chosen so far.
+        nearest = None
+        for _ in range(count):
+            from_landmark = engine.distance_table(weights, cols, landmark)
+            self.landmarks.append(landmark)
+            self.from_tables.append(_to_table(from_landmark))
+            self.to_tables.append(_to_table(engine.distance_table(weights, cols, landmark, reverse=True)))
+
+            if nearest is None:
+                nearest = from_landmark
+            else:
+                nearest = array('d', map(min, nearest, from_landmark))
+            farthest, landmark = 0, None
+            for index, distance in enumerate(nearest):
+                if farthest < distance < engine.INF:
+                    farthest, landmark = distance, index
+            if landmark is None:
+                break
+
+    def heuristic(self, goal):
+        fallback = engine.manhattan(self.cols, goal)
+        tables = [(from_table, to_table, from_table[goal], to_table[goal])
+                  for from_table, to_table in zip(self.from_tables, self.to_tables)
+                  if from_table[goal] != UNREACHABLE]
+
+        def h(index):
+            best = fallback(index)
+            for from_table, to_table, from_goal, to_goal in tables:
+                from_index = from_table[index]
+                if from_index == UNREACHABLE:
+                    continue
+                bound = from_goal - from_index
+                if bound > best:
+                    best = bound
+                bound = to_table[index] - to_goal
+                if bound > best:
+                    best = bound
+            return best
+        return h
+
+class LandmarkCache:
+    # Keeps one index per grid version and rebuilds it on the first query
+    # after the grid has changed.
+    def __init__(self, count=DEFAULT_LANDMARKS):
+        self.count = count
+        self.index = None
+        self.version = None
+
+    def get(self, weights, cols, version):
+        if self.index is None or self.version != version:
+            self.index = LandmarkIndex(weights, cols, self.count)
+            self.version = version
+        return self.index
+
+    def invalidate(self):
+        self.index = None
@@ -1,8 +1,11 @@
 import pygame
-pygame.init()
+# Only the display (which brings events) and font modules are used.
+pygame.display.init()
+pygame.font.init()
 
 from config import WIDTH, HEIGHT, FPS
-from screens import home_screen_loop, visualizer_loop, Screen
+from screens import home_screen_loop, visualizer_loop, Screen, app_state
+import race
 
 def main():
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
@@ -26,9 +29,13 @@ def main():
         if current_screen == Screen.QUIT:
             running = False
 
-        pygame.display.flip()
+        if app_state.dirty_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(app_state.dirty_rects)
         clock.tick(FPS)
 
+    race.shutdown()
     pygame.quit()
 
 if __name__ == '__main__':
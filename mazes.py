@@ -0,0 +1,189 @@
+import argparse
+import random
+import sys
+from array import array
+import storage
+from config import NODE_TYPE_CODES
+
+# Maze generators that scale to large grids. Like the recursive backtracker in
+# algorithms.py, rooms sit on odd (row, col) cells and the cells between them
+# are walls until carved.
+#
+# Kruskal's and Prim's are written as carve generators that yield the cells to
+# open in order, so the visualizer can animate them; generate() runs the same
+# generators straight into a byte buffer of type codes. Eller's algorithm only
+# keeps one row of state and emits the maze row by row, so it can stream mazes
+# of any height into the grid or a file.
+
+AIR = NODE_TYPE_CODES["AIR"]
+WALL = NODE_TYPE_CODES["WALL"]
+
+def _room_shape(rows, cols):
+    return max(0, (rows - 1) // 2), max(0, (cols - 1) // 2)
+
+def kruskal_carves(rows, cols, rng):
+    room_rows, room_cols = _room_shape(rows, cols)
+    rooms = room_rows * room_cols
+    if rooms == 1:
+        yield (cols + 1,)
+    parent = array('i', range(rooms))
+    size = array('i', [1]) * rooms
+
+    def find(room):
+        while parent[room] != room:
+            parent[room] = parent[parent[room]]
+            room = parent[room]
+        return room
+
+    # Edge e < rooms joins room e to the room on its right; e >= rooms joins
+    # room e - rooms to the room below it.
+    edges = [e for e in range(rooms) if e % room_cols < room_cols - 1]
+    edges += [rooms + e for e in range(rooms - room_cols)]
+    rng.shuffle(edges)
+
+    for edge in edges:
+        a = edge if edge < rooms else edge - rooms
+        b = a + 1 if edge < rooms else a + room_cols
+        root_a, root_b = find(a), find(b)
+        if root_a == root_b:
+            continue
+        if size[root_a] < size[root_b]:
+            root_a, root_b = root_b, root_a
+        parent[root_b] = root_a
+        size[root_a] += size[root_b]
+
+        row_a, col_a = divmod(a, room_cols)
+        row_b, col_b = divmod(b, room_cols)
+        cell_a = (2 * row_a + 1) * cols + 2 * col_a + 1
+        cell_b = (2 * row_b + 1) * cols + 2 * col_b + 1
+        yield (cell_a, (cell_a + cell_b) // 2, cell_b)
+
+def prim_carves(rows, cols, rng):
+    room_rows, room_cols = _room_shape(rows, cols)
+    rooms = room_rows * room_cols
+    if not rooms:
+        return
+    in_maze = bytearray(rooms)
+
+    def frontier_walls(room):
+        row, col = divmod(room, room_cols)
+        if row > 0: yield room, room - room_cols
+        if row < room_rows - 1: yield room, room + room_cols
+        if col > 0: yield room, room - 1
+        if col < room_cols - 1: yield room, room + 1
+
+    def cell(room):
+        row, col = divmod(room, room_cols)
+        return (2 * row + 1) * cols + 2 * col + 1
+
+    first = rng.randrange(rooms)
+    in_maze[first] = 1
+    yield (cell(first),)
+    frontier = list(frontier_walls(first))
+
+    while frontier:
+        # Swap-remove a random frontier wall in O(1).
+        i = rng.randrange(len(frontier))
+        frontier[i], frontier[-1] = frontier[-1], frontier[i]
+        room, other = frontier.pop()
+        if in_maze[other]:
+            continue
+        in_maze[other] = 1
+        cell_a, cell_b = cell(room), cell(other)
+        yield ((cell_a + cell_b) // 2, cell_b)
+        frontier.extend(wall for wall in frontier_walls(other) if not in_maze[wall[1]])
+
+def eller_rows(rows, cols, rng):
+    # Yields the maze one grid row at a time as bytes of type codes.
+    if rows < 1:
+        return
+    room_rows, room_cols = _room_shape(rows, cols)
+    solid = bytes([WALL]) * cols
+    yield solid
+
+    sets = [0] * room_cols
+    next_set = 1
+    for room_row in range(room_rows):
+        members = {}
+        for col in range(room_cols):
+            if not sets[col]:
+                sets[col] = next_set
+                next_set += 1
+            members.setdefault(sets[col], []).append(col)
+
+        last = room_row == room_rows - 1
+        row = bytearray(solid)
+        for col in range(room_cols):
+            row[2 * col + 1] = AIR
+        for col in range(room_cols - 1):
+            left, right = sets[col], sets[col + 1]
+            if left != right and (last or rng.random() < 0.5):
+                # Merge the smaller set into the larger one.
+                if len(members[left]) < len(members[right]):
+                    left, right = right, left
+                for member in members.pop(right):
+                    sets[member] = left
+                    members[left].append(member)
+                row[2 * col + 2] = AIR
+        yield bytes(row)
+
+        below = bytearray(solid)
+        if not last:
+            next_sets = [0] * room_cols
+            for set_id, cols_in_set in members.items():
+                rng.shuffle(cols_in_set)
+                for col in cols_in_set[:rng.randint(1, len(cols_in_set))]:
+                    next_sets[col] = set_id
+                    below[2 * col + 1] = AIR
+            sets = next_sets
+        yield bytes(below)
+
+    for _ in range(1 + 2 * room_rows, rows):
+        yield solid
+
+CARVE_GENERATORS = {
+    "kruskal": kruskal_carves,
+    "prim": prim_carves,
+}
+
+GENERATORS = ["kruskal", "prim", "eller"]
+
+def generate(algorithm, rows, cols, seed=None):
+    # Non-animated fast path: returns a bytearray of rows*cols type codes.
+    rng = random.Random(seed)
+    if algorithm == "eller":
+        return bytearray().join(eller_rows(rows, cols, rng))
+
+    codes = bytearray([WALL]) * (rows * cols)
+    for cells in CARVE_GENERATORS[algorithm](rows, cols, rng):
+        for index in cells:
+            codes[index] = AIR
+    return codes
+
+def stream_eller(f, rows, cols, seed=None):
+    # Writes the raw row-major type codes straight to a binary file object.
+    for row in eller_rows(rows, cols, random.Random(seed)):
+        f.write(row)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a maze and save it in the storage.py grid format.")
+    parser.add_argument("algorithm", choices=GENERATORS)
+    parser.add_argument("output", help="output file, or - for stdout")
+    parser.add_argument("--rows", type=int, default=2001)
+    parser.add_argument("--cols", type=int, default=2001)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        storage.write_header(out, args.rows, args.cols)
+        if args.algorithm == "eller":
+            stream_eller(out, args.rows, args.cols, args.seed)
+        else:
+            out.write(generate(args.algorithm, args.rows, args.cols, args.seed))
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import csv
+import json
+import time
+
+# Per-run search metrics for the visualizer. The solver counters come straight
+# from the SearchResult; the phase timings are measured around the solve and
+# the animated replay. Runs are kept for the session and can be exported.
+
+FIELDS = ["algorithm", "frontier", "rows", "cols", "found", "cost", "path_length", "expanded", "pushes", "pops",
+          "stale", "max_open", "cached", "solve_ms", "replay_ms", "path_ms"]
+
+class RunMetrics:
+    def __init__(self, algorithm, rows, cols, result, solve_time, cached=False, frontier=None):
+        self.algorithm = algorithm
+        self.frontier = frontier
+        self.rows = rows
+        self.cols = cols
+        self.result = result
+        self.cached = cached
+        self.phases = {"solve": solve_time}
+
+    def as_dict(self):
+        result = self.result
+        phases = {name: seconds * 1000 for name, seconds in self.phases.items()}
+        return {
+            "algorithm": self.algorithm,
+            "frontier": self.frontier,
+            "rows": self.rows,
+            "cols": self.cols,
+            "found": result.found,
+            "cost": result.cost,
+            "path_length": len(result.path),
+            "expanded": result.expanded,
+            "pushes": result.pushes,
+            "pops": result.pops,
+            "stale": result.stale,
+            "max_open": result.max_open,
+            "cached": self.cached,
+            "solve_ms": phases["solve"],
+            "replay_ms": phases.get("replay"),
+            "path_ms": phases.get("path"),
+        }
+
+class MetricsLog:
+    def __init__(self):
+        self.runs = []
+
+    @property
+    def latest(self):
+        return self.runs[-1] if self.runs else None
+
+    def record(self, algorithm, rows, cols, result, solve_time, cached=False, frontier=None):
+        run = RunMetrics(algorithm, rows, cols, result, solve_time, cached, frontier)
+        self.runs.append(run)
+        return run
+
+    def export_json(self, path):
+        with open(path, "w") as f:
+            json.dump([run.as_dict() for run in self.runs], f, indent=2)
+
+    def export_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            for run in self.runs:
+                writer.writerow(run.as_dict())
+
+def timed_steps(steps, run, phase):
+    # Passes a step generator through, adding only the time spent inside its
+    # steps (not the frames spent waiting between them) to run.phases[phase].
+    run.phases[phase] = 0
+    while True:
+        started = time.perf_counter()
+        try:
+            value = next(steps)
+        except StopIteration:
+            return
+        finally:
+            run.phases[phase] += time.perf_counter() - started
+        yield value
+
+metrics_log = MetricsLog()
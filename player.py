@@ -0,0 +1,162 @@
+import struct
+import sys
+from array import array
+from itertools import compress
+import engine
+
+# Seekable replay of a recorded search. A solver runs once at full speed and
+# records its trace (engine.py: cell index << 3 | event kind); the player
+# appends the found path as TRACE_PATH events and paints any prefix of that
+# stream onto the grid. Steps match the old animation: one per closed cell,
+# then one per path cell.
+#
+# Seeking forward paints the events in between; seeking backward restores the
+# colours they replaced, which are kept in an undo array as events are
+# applied. Either way the cost is the number of events crossed, never a new
+# search.
+
+TRACE_PATH = 4
+
+MAGIC = b"PFTR"
+VERSION = 1
+# magic | version u8 | 3 pad bytes | rows u32 | cols u32 | start i64 | goal i64
+# | grid content hash u64 | trace length u32 | path length u32, then the trace
+# and the path as little-endian u32 arrays.
+HEADER = struct.Struct("<4sB3xIIqqQII")
+
+# Offset of the byte holding the event kind in each event's 4 bytes, and a
+# bytes.translate table marking the kinds that start a step (closed cells).
+KIND_BYTE = 0 if sys.byteorder == "little" else 3
+STEP_KINDS = bytes(1 if (code & 7) in (engine.TRACE_CLOSE, engine.TRACE_CLOSE_REVERSE) else 0
+                   for code in range(256))
+
+class TracePlayer:
+    def __init__(self, grid, event_colors):
+        # event_colors maps each event kind (0..TRACE_PATH) to a packed colour.
+        self.grid = grid
+        self.event_colors = event_colors
+        self.clear()
+
+    def clear(self):
+        self.events = array('I')
+        self.previous = array('I')
+        self.stops = array('I', [0])
+        self.applied = 0
+        self.step = 0
+        self.path_step = 0
+        self.trace_length = 0
+        self.path = array('I')
+        self.start = self.goal = None
+        self.cost = None
+
+    @property
+    def loaded(self):
+        return self.start is not None
+
+    @property
+    def last_step(self):
+        return len(self.stops) - 1
+
+    @property
+    def at_end(self):
+        return self.step == self.last_step
+
+    def load(self, trace, start, goal, path=(), cost=None):
+        # Takes over a trace recorded on the grid as it is now, unpainted.
+        self.begin(start, goal)
+        self.extend(trace)
+        self.finish(path, cost)
+
+    def begin(self, start, goal):
+        # Starts an empty trace that extend() grows while its search is still
+        # running; finish() adds the path once the search is done.
+        self.clear()
+        self.start, self.goal = start, goal
+
+    def extend(self, trace):
+        # The steps are found in C: the kind bytes are sliced out of the raw
+        # events and marked, and compress() keeps the marked positions.
+        events, stops = self.events, self.stops
+        position = len(events)
+        events.extend(trace)
+        marks = events[position:].tobytes()[KIND_BYTE::4].translate(STEP_KINDS)
+        # The very first event never starts a step.
+        first = 0 if position else 1
+        stops.extend(compress(range(position + first, len(events)), marks[first:]))
+        self.previous.frombytes(bytes(4 * len(trace)))
+
+    def finish(self, path=(), cost=None):
+        events, stops = self.events, self.stops
+        # path_step shows the whole search and none of the path.
+        self.trace_length = len(events)
+        if stops[-1] != len(events):
+            stops.append(len(events))
+        self.path_step = len(stops) - 1
+        for index in path[1:-1]:
+            events.append(index << 3 | TRACE_PATH)
+            stops.append(len(events))
+        self.previous.frombytes(bytes(4 * (len(events) - self.trace_length)))
+        self.path = array('I', path)
+        self.cost = cost
+
+    def seek(self, step):
+        step = max(0, min(self.last_step, step))
+        target = self.stops[step]
+        grid, events, previous = self.grid, self.events, self.previous
+        endpoints = (self.start, self.goal)
+        if target > self.applied:
+            colors, event_colors = grid.colors, self.event_colors
+            for position in range(self.applied, target):
+                event = events[position]
+                index = event >> 3
+                if index not in endpoints:
+                    previous[position] = colors[index]
+                    grid.paint(index, event_colors[event & 7])
+        else:
+            for position in range(self.applied - 1, target - 1, -1):
+                index = events[position] >> 3
+                if index not in endpoints:
+                    grid.paint(index, previous[position])
+        self.applied = target
+        self.step = step
+
+    def step_forward(self):
+        self.seek(self.step + 1)
+
+    def step_back(self):
+        self.seek(self.step - 1)
+
+    def steps(self, until=None):
+        # One step per iteration from the current position to `until` (default
+        # the end), for the visualizer's step scheduler.
+        until = self.last_step if until is None else until
+        while self.step < until:
+            self.seek(self.step + 1)
+            yield
+
+def _little_endian(values):
+    if sys.byteorder == "big":
+        values = array('I', values)
+        values.byteswap()
+    return values
+
+def save(path, player, rows, cols, content_hash):
+    trace = player.events[:player.trace_length]
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, rows, cols, player.start, player.goal,
+                            content_hash, len(trace), len(player.path)))
+        f.write(_little_endian(trace).tobytes())
+        f.write(_little_endian(player.path).tobytes())
+
+def load(path):
+    # Returns (rows, cols, start, goal, content_hash, trace, path cells).
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path}: not a trace file")
+    magic, version, rows, cols, start, goal, content_hash, trace_length, path_length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or len(data) != HEADER.size + 4 * (trace_length + path_length):
+        raise ValueError(f"{path}: not a trace file")
+    trace = _little_endian(array('I', data[HEADER.size:HEADER.size + 4 * trace_length]))
+    cells = _little_endian(array('I', data[HEADER.size + 4 * trace_length:]))
+    return rows, cols, start, goal, content_hash, trace, cells
@@ -0,0 +1,67 @@
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import engine
+
+# Runs every solver on the same grid at once in a process pool. The grid is
+# copied into an immutable snapshot first, so nothing the workers read can be
+# edited while they run.
+
+_executor = None
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor()
+    return _executor
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+class GridSnapshot:
+    __slots__ = ("weights", "cols", "start", "goal")
+
+    def __init__(self, weights, cols, start, goal):
+        self.weights = bytes(weights)
+        self.cols = cols
+        self.start = start
+        self.goal = goal
+
+class RaceEntry:
+    def __init__(self, algorithm, result, elapsed, trace):
+        self.algorithm = algorithm
+        self.result = result
+        self.elapsed = elapsed
+        self.trace = trace
+
+def run_entry(algorithm, snapshot):
+    # The timed run has no trace so the numbers match the headless solvers; the
+    # trace for replay is recorded in a second pass.
+    solver = engine.SOLVERS[algorithm]
+    started = time.perf_counter()
+    result = solver(snapshot.weights, snapshot.cols, snapshot.start, snapshot.goal)
+    elapsed = time.perf_counter() - started
+
+    trace = array('I')
+    solver(snapshot.weights, snapshot.cols, snapshot.start, snapshot.goal, trace)
+    return RaceEntry(algorithm, result, elapsed, trace)
+
+class Race:
+    def __init__(self, snapshot, algorithms=None):
+        self.algorithms = list(algorithms or engine.SOLVERS)
+        executor = get_executor()
+        self.futures = [executor.submit(run_entry, algorithm, snapshot) for algorithm in self.algorithms]
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+    def results(self):
+        # Results come back in the order the algorithms were given.
+        return [future.result() for future in self.futures]
+
+    def cancel(self):
+        for future in self.futures:
+            future.cancel()
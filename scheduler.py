@@ -0,0 +1,74 @@
+import time
+from config import STEP_BUDGET_MS, SPEED_MODES
+
+# Yielded by a step generator that is waiting on background work (worker.py):
+# it ends this frame's stepping without counting as a step or a result.
+WAITING = object()
+
+class StepScheduler:
+    # Advances a step generator as far as the current speed mode allows, without
+    # spending more than the per-frame time budget.
+    def __init__(self, budget_ms=STEP_BUDGET_MS, modes=SPEED_MODES):
+        self.budget = budget_ms / 1000
+        self.modes = modes
+        self.mode_index = 0
+        self.steps_per_second = 0
+        self._window_start = time.perf_counter()
+        self._window_steps = 0
+        self._carry = 0
+
+    @property
+    def mode_name(self):
+        return self.modes[self.mode_index][0]
+
+    @property
+    def steps_per_frame(self):
+        return self.modes[self.mode_index][1]
+
+    def cycle_mode(self):
+        self.mode_index = (self.mode_index + 1) % len(self.modes)
+
+    def reset_rate(self):
+        self.steps_per_second = 0
+        self._window_start = time.perf_counter()
+        self._window_steps = 0
+
+    def advance(self, iterator):
+        # Returns (finished, result). A step that yields anything other than None
+        # ends the run with that value as the result.
+        limit = self.steps_per_frame
+        if limit is not None and limit < 1:
+            # Slower than a step per frame: step once enough frames add up.
+            self._carry += limit
+            if self._carry < 1:
+                self._record(0)
+                return False, None
+            self._carry -= 1
+            limit = 1
+        deadline = time.perf_counter() + self.budget
+        steps = 0
+        finished, result = False, None
+        try:
+            while True:
+                value = next(iterator)
+                if value is WAITING:
+                    break
+                steps += 1
+                if value is not None:
+                    finished, result = True, value
+                    break
+                if steps == limit or time.perf_counter() >= deadline:
+                    break
+        except StopIteration:
+            finished = True
+
+        self._record(steps)
+        return finished, result
+
+    def _record(self, steps):
+        self._window_steps += steps
+        elapsed = time.perf_counter() - self._window_start
+        if elapsed >= 0.5:
+            self.steps_per_second = round(self._window_steps / elapsed)
+            self._window_start += elapsed
+            self._window_steps = 0
@@ -1,9 +1,49 @@
 import pygame
+import player
+import storage
+from metrics import metrics_log
 from enum import Enum, auto
 from config import *
-from grid import grid_instance
+from grid import grid_instance, pack_color
 from ui import Button, Panel, draw_text
-from algorithms import a_star_search, dijkstra_search, bfs_search, dfs_search, generate_maze_recursive_backtracking
+from scheduler import StepScheduler
+from incremental import DStarLite
+from flowfield import FlowField, NO_STEP
+from engine import INF
+from race import Race, GridSnapshot
+from worker import search_worker
+from algorithms import (a_star_search, alt_a_star_search, hpa_search, jps_search, dijkstra_search, bfs_search, dfs_search,
+                        bidirectional_a_star_search, bidirectional_dijkstra_search,
+                        generate_maze_recursive_backtracking, generate_maze_kruskal, generate_maze_prim,
+                        generate_maze_eller, load_maze, paint_trace, paint_path, trace_player)
+
+MAZE_ANIMATIONS = {
+    "backtracking": generate_maze_recursive_backtracking,
+    "kruskal": generate_maze_kruskal,
+    "prim": generate_maze_prim,
+    "eller": generate_maze_eller,
+}
+
+BRUSH_LABELS = {
+    'brush_start': 'Start',
+    'brush_end': 'End',
+    'brush_wall': 'Wall',
+    'brush_air': 'Erase',
+    'brush_dirt': f'Dirt ({NODE_WEIGHTS["DIRT"]})',
+    'brush_mud': f'Mud ({NODE_WEIGHTS["MUD"]})',
+    'brush_tar': f'Tar ({NODE_WEIGHTS["TAR"]})',
+}
+
+# Flow Field heatmap, near to far, and the arrow for each step direction.
+FLOW_SHADES = [pack_color(tuple(round(near + (far - near) * i / 63) for near, far in zip(FLOW_NEAR_COLOR, FLOW_FAR_COLOR)))
+               for i in range(64)]
+FLOW_VECTORS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+def build_flow_field(weights, cols, goal):
+    # Runs on the worker: the field, and the largest finite cost to scale the
+    # shades by.
+    field = FlowField(weights, cols, goal)
+    return field, max((d for d in field.dist if d < INF), default=0) or 1
 
 class Screen(Enum):
     HOME = auto()
@@ -22,22 +62,70 @@ class AppState:
     def init_state(self):
         self.algorithm_iterator = None
         self.is_running_algo = False
+        self.replaying = False
         self.selected_brush = "WALL"
+        self.maze_index = 0
+        self.frontier_index = 0
+        self.status_message = None
+        self.metrics_visible = False
         self.path_cost = None
-        self.ui_elements = {}
-        self.fonts = {
-            "title": pygame.font.SysFont("Arial", 72, bold=True),
-            "button": pygame.font.SysFont("Arial", 20),
-            "label": pygame.font.SysFont("Arial", 14)
-        }
-        self._create_ui_elements()
+        self.scheduler = StepScheduler()
+        self.live_planner = None
+        self.live_path = []
+        self.live_changes = set()
+        self.live_invalid = False
+        self.flow_enabled = False
+        self.flow_field = None
+        self.flow_job = None
+        self.flow_goal = None
+        self.flow_painted = 0
+        self.flow_changes = set()
+        self.flow_repaint = set()
+        self.flow_invalid = False
+        self.flow_path = []
+        self.flow_scale = 1
+        self.flow_repaired = 0
+        self.race = None
+        self.race_results = None
+        self.race_current = None
+        grid_instance.add_listener(self.on_cell_changed)
+        self._ui_elements = None
+        self._fonts = None
+        self.background = None
+        self.panning = False
+        self.needs_full_redraw = True
+        self.ui_dirty = True
+        self.stats_visible = False
+        self.dirty_rects = None
+
+    @property
+    def fonts(self):
+        # SysFont scans the installed fonts, so it waits until something is drawn.
+        if self._fonts is None:
+            self._fonts = {
+                "title": pygame.font.SysFont("Arial", 72, bold=True),
+                "button": pygame.font.SysFont("Arial", 20),
+                "label": pygame.font.SysFont("Arial", 14)
+            }
+        return self._fonts
+
+    @property
+    def ui_elements(self):
+        # The visualizer's widgets are built on first use, not at import.
+        if self._ui_elements is None:
+            self._ui_elements = {}
+            self._create_ui_elements()
+        return self._ui_elements
 
     def _create_ui_elements(self):
         self.ui_elements['bottom_panel'] = Panel(0, BOTTOM_PANEL_Y, WIDTH, BOTTOM_PANEL_HEIGHT, COLOR_GRAY_DARK)
+        self.ui_elements['side_panel'] = Panel(SIDE_PANEL_X, SIDE_PANEL_Y, SIDE_PANEL_WIDTH, SIDE_PANEL_HEIGHT, COLOR_GRAY_DARK)
+        self.ui_elements['info_panel'] = Panel(INFO_PANEL_X, INFO_PANEL_Y, INFO_PANEL_WIDTH, INFO_PANEL_HEIGHT, COLOR_GRAY_DARK)
+        self.ui_elements['stats_panel'] = Panel(0, 0, WIDTH, STATS_BAR_HEIGHT, COLOR_GRAY_DARK)
         
         btn_x, btn_y, btn_w, btn_h, btn_gap = 20, BOTTOM_PANEL_Y + 15, 80, 40, 5
-        self.ui_elements['btn_astar'] = Button(btn_x, btn_y, btn_w, btn_h, "A*", self.fonts['button'], lambda: self.start_algorithm(a_star_search))
-        self.ui_elements['btn_dijkstra'] = Button(btn_x + (btn_w + btn_gap), btn_y, btn_w, btn_h, "Dijkstra", self.fonts['button'], lambda: self.start_algorithm(dijkstra_search))
+        self.ui_elements['btn_astar'] = Button(btn_x, btn_y, btn_w, btn_h, "A*", self.fonts['button'], lambda: self.start_algorithm(lambda: a_star_search(self.frontier)))
+        self.ui_elements['btn_dijkstra'] = Button(btn_x + (btn_w + btn_gap), btn_y, btn_w, btn_h, "Dijkstra", self.fonts['button'], lambda: self.start_algorithm(lambda: dijkstra_search(self.frontier)))
         self.ui_elements['btn_bfs'] = Button(btn_x + 2*(btn_w + btn_gap), btn_y, btn_w, btn_h, "BFS", self.fonts['button'], lambda: self.start_algorithm(bfs_search))
         self.ui_elements['btn_dfs'] = Button(btn_x + 3*(btn_w + btn_gap), btn_y, btn_w, btn_h, "DFS", self.fonts['button'], lambda: self.start_algorithm(dfs_search))
 
@@ -66,44 +154,510 @@ class AppState:
         self.ui_elements['brush_mud'].color = NODE_COLORS["MUD"]
         self.ui_elements['brush_tar'].color = NODE_COLORS["TAR"]
 
+        side_x, side_y, side_w = SIDE_PANEL_X + 10, SIDE_PANEL_Y + 10, SIDE_PANEL_WIDTH - 20
+        self.ui_elements['btn_speed'] = Button(side_x, side_y, side_w, btn_h, f"Speed: {self.scheduler.mode_name}", self.fonts['button'], self.cycle_speed)
+        side_y += btn_h + 30
+        self.ui_elements['btn_maze_type'] = Button(side_x, side_y, side_w, btn_h, f"Maze: {MAZE_GENERATORS[self.maze_index][1]}", self.fonts['button'], self.cycle_maze)
+        side_y += btn_h + btn_gap
+        self.ui_elements['btn_frontier'] = Button(side_x, side_y, side_w, btn_h, f"Queue: {FRONTIER_MODES[self.frontier_index][1]}", self.fonts['button'], self.cycle_frontier)
+        side_y += btn_h + 30
+        self.ui_elements['btn_jps'] = Button(side_x, side_y, side_w, btn_h, "Jump Point Search", self.fonts['button'], lambda: self.start_algorithm(jps_search))
+        side_y += btn_h + btn_gap
+        self.ui_elements['btn_alt'] = Button(side_x, side_y, side_w, btn_h, "A* (Landmarks)", self.fonts['button'], lambda: self.start_algorithm(lambda: alt_a_star_search(self.frontier)))
+        side_y += btn_h + btn_gap
+        self.ui_elements['btn_hpa'] = Button(side_x, side_y, side_w, btn_h, "HPA* (Clusters)", self.fonts['button'], lambda: self.start_algorithm(hpa_search))
+        side_y += btn_h + btn_gap
+        self.ui_elements['btn_bi_astar'] = Button(side_x, side_y, side_w, btn_h, "Bidirectional A*", self.fonts['button'], lambda: self.start_algorithm(bidirectional_a_star_search))
+        side_y += btn_h + btn_gap
+        self.ui_elements['btn_bi_dijkstra'] = Button(side_x, side_y, side_w, btn_h, "Bidirectional Dijkstra", self.fonts['button'], lambda: self.start_algorithm(bidirectional_dijkstra_search))
+        side_y += btn_h + btn_gap
+        self.ui_elements['btn_live'] = Button(side_x, side_y, side_w, btn_h, "Live Replan: Off", self.fonts['button'], self.toggle_live)
+        side_y += btn_h + btn_gap
+        self.ui_elements['btn_race'] = Button(side_x, side_y, side_w, btn_h, "Race All", self.fonts['button'], self.start_race)
+        side_y += btn_h + btn_gap
+        self.ui_elements['btn_flow'] = Button(side_x, side_y, side_w, btn_h, "Flow Field: Off", self.fonts['button'], self.toggle_flow)
+        side_y += btn_h + 30
+        half_w = (side_w - btn_gap) // 2
+        self.ui_elements['btn_save'] = Button(side_x, side_y, half_w, btn_h, "Save", self.fonts['button'], self.save_grid)
+        self.ui_elements['btn_load'] = Button(side_x + half_w + btn_gap, side_y, half_w, btn_h, "Load", self.fonts['button'], self.load_grid)
+        side_y += btn_h + 30
+        self.ui_elements['btn_export_json'] = Button(side_x, side_y, half_w, btn_h, "JSON", self.fonts['button'], lambda: self.export_metrics("json"))
+        self.ui_elements['btn_export_csv'] = Button(side_x + half_w + btn_gap, side_y, half_w, btn_h, "CSV", self.fonts['button'], lambda: self.export_metrics("csv"))
+
     def start_algorithm(self, algo_func):
         if not self.is_running_algo and grid_instance.start_node and grid_instance.end_node:
+            self.stop_live()
+            self.stop_flow()
             self.reset_path()
             self.algorithm_iterator = algo_func()
             self.is_running_algo = True
+            self.replaying = True
             self.path_cost = None
+            self.metrics_visible = True
+            self.scheduler.reset_rate()
+
+    def toggle_replay(self):
+        # Pauses the playing search, or plays the last one on from where it
+        # stands (from the start if it had finished).
+        if self.is_running_algo:
+            if self.replaying and not search_worker.busy:
+                self.is_running_algo = False
+                self.algorithm_iterator = None
+                self.replaying = False
+            return
+        if trace_player.loaded:
+            if trace_player.at_end:
+                trace_player.seek(0)
+            self.algorithm_iterator = trace_player.steps()
+            self.is_running_algo = True
+            self.replaying = True
+            self.status_message = None
+            self.path_cost = trace_player.cost
+            self.scheduler.reset_rate()
+
+    def cancel_background(self):
+        # Esc drops a search or maze still running on the worker thread, along
+        # with whatever of it was painted.
+        if not search_worker.busy:
+            return
+        search_worker.cancel()
+        self.is_running_algo = False
+        self.algorithm_iterator = None
+        self.replaying = False
+        self.reset_path()
+        self.status_message = "Cancelled"
+
+    def seek_replay(self, step):
+        if not self.is_running_algo and trace_player.loaded:
+            trace_player.seek(step)
+            self.status_message = None
+
+    def handle_replay_key(self, event):
+        # Space plays/pauses the last search. While paused the arrows step it,
+        # Page Up/Down jump a tenth of it and Home/End go to either end.
+        # T saves the trace and Shift+T loads the saved one. Esc cancels a
+        # search still running in the background.
+        key = event.key
+        jump = max(1, trace_player.last_step // 10)
+        if key == pygame.K_ESCAPE:
+            self.cancel_background()
+        elif key == pygame.K_SPACE:
+            self.toggle_replay()
+        elif key == pygame.K_t:
+            if event.mod & pygame.KMOD_SHIFT:
+                self.load_trace()
+            else:
+                self.save_trace()
+        elif key == pygame.K_LEFT:
+            self.seek_replay(trace_player.step - 1)
+        elif key == pygame.K_RIGHT:
+            self.seek_replay(trace_player.step + 1)
+        elif key == pygame.K_PAGEUP:
+            self.seek_replay(trace_player.step - jump)
+        elif key == pygame.K_PAGEDOWN:
+            self.seek_replay(trace_player.step + jump)
+        elif key == pygame.K_HOME:
+            self.seek_replay(0)
+        elif key == pygame.K_END:
+            self.seek_replay(trace_player.last_step)
+
+    def save_trace(self):
+        if self.is_running_algo:
+            return
+        if not trace_player.loaded:
+            self.status_message = "Run a search first to save its trace"
+            return
+        try:
+            player.save(TRACE_SAVE_FILE, trace_player, grid_instance.rows, grid_instance.cols,
+                        grid_instance.content_hash())
+            self.status_message = f"Saved trace to {TRACE_SAVE_FILE}"
+        except OSError as e:
+            self.status_message = f"Could not save trace: {e.strerror}"
+
+    def load_trace(self):
+        # A trace only replays on the grid it was recorded on.
+        if self.is_running_algo:
+            return
+        try:
+            rows, cols, start, goal, content_hash, trace, path = player.load(TRACE_SAVE_FILE)
+        except OSError as e:
+            self.status_message = f"Could not load trace: {e.strerror}"
+            return
+        except ValueError as e:
+            self.status_message = f"Could not load trace: {e}"
+            return
+        if (rows, cols) != (grid_instance.rows, grid_instance.cols) or content_hash != grid_instance.content_hash():
+            self.status_message = "Could not load trace: it was recorded on a different grid"
+            return
+        self.reset_path()
+        cost = sum(grid_instance.weights[index] for index in path[1:]) if path else None
+        trace_player.load(trace, start, goal, path, cost)
+        self.status_message = f"Loaded trace from {TRACE_SAVE_FILE}; press Space to play"
 
     def generate_maze(self):
         if not self.is_running_algo:
+            self.stop_live()
+            self.stop_flow()
             self.clear_all()
-            self.algorithm_iterator = generate_maze_recursive_backtracking()
+            algorithm = MAZE_GENERATORS[self.maze_index][0]
+            if self.scheduler.steps_per_frame is None and algorithm != "backtracking":
+                # Instant mode skips the animation and writes the maze in bulk.
+                self.algorithm_iterator = load_maze(algorithm)
+            else:
+                self.algorithm_iterator = MAZE_ANIMATIONS[algorithm]()
+            self.is_running_algo = True
+            self.scheduler.reset_rate()
+
+    @property
+    def frontier(self):
+        return FRONTIER_MODES[self.frontier_index][0]
+
+    def cycle_frontier(self):
+        self.frontier_index = (self.frontier_index + 1) % len(FRONTIER_MODES)
+        self.ui_elements['btn_frontier'].text = f"Queue: {FRONTIER_MODES[self.frontier_index][1]}"
+
+    def cycle_maze(self):
+        self.maze_index = (self.maze_index + 1) % len(MAZE_GENERATORS)
+        self.ui_elements['btn_maze_type'].text = f"Maze: {MAZE_GENERATORS[self.maze_index][1]}"
+
+    def start_race(self):
+        if not self.is_running_algo and grid_instance.start_node and grid_instance.end_node:
+            self.stop_live()
+            self.stop_flow()
+            self.reset_path()
+            snapshot = GridSnapshot(grid_instance.weights, grid_instance.cols,
+                                    grid_instance.start_node.index, grid_instance.end_node.index)
+            self.race = Race(snapshot)
             self.is_running_algo = True
-    
+            self.scheduler.reset_rate()
+
+    def update_race(self):
+        if not self.race.done():
+            return
+        self.race_results = self.race.results()
+        self.race = None
+        self.algorithm_iterator = self.replay_race(self.race_results)
+
+    def replay_race(self, entries):
+        # Replays each collected trace in turn, finishing on the last one.
+        start, end = grid_instance.start_node.index, grid_instance.end_node.index
+        for entry in entries:
+            self.race_current = entry.algorithm
+            grid_instance.reset_path()
+            yield from paint_trace(entry.trace, start, end)
+            if entry.result.found:
+                yield from paint_path(entry.result)
+        self.race_current = None
+
+    def save_grid(self):
+        if self.is_running_algo:
+            return
+        try:
+            storage.save(GRID_SAVE_FILE, grid_instance)
+            self.status_message = f"Saved grid to {GRID_SAVE_FILE}"
+        except OSError as e:
+            self.status_message = f"Could not save grid: {e.strerror}"
+
+    def load_grid(self):
+        if self.is_running_algo:
+            return
+        self.stop_live()
+        self.stop_flow()
+        try:
+            storage.load(GRID_SAVE_FILE, grid_instance)
+            trace_player.clear()
+        except OSError as e:
+            self.status_message = f"Could not load grid: {e.strerror}"
+            return
+        except ValueError as e:
+            self.status_message = f"Could not load grid: {e}"
+            return
+        self.path_cost = None
+        self.race_results = None
+        self.metrics_visible = False
+        self.status_message = f"Loaded {grid_instance.rows}x{grid_instance.cols} grid from {GRID_SAVE_FILE}"
+
+    def export_metrics(self, fmt):
+        if not metrics_log.runs:
+            self.status_message = "No runs to export yet"
+            return
+        path = f"{METRICS_FILE}.{fmt}"
+        try:
+            if fmt == "json":
+                metrics_log.export_json(path)
+            else:
+                metrics_log.export_csv(path)
+        except OSError as e:
+            self.status_message = f"Could not export metrics: {e.strerror}"
+            return
+        self.status_message = f"Exported {len(metrics_log.runs)} runs to {path}"
+
+    def cycle_speed(self):
+        self.scheduler.cycle_mode()
+        self.ui_elements['btn_speed'].text = f"Speed: {self.scheduler.mode_name}"
+
     def set_brush(self, brush_type):
         self.selected_brush = brush_type
 
+    def paint_node(self, node, brush_type):
+        # An edited grid no longer matches the recorded trace.
+        if node is not None:
+            trace_player.clear()
+            if self.flow_enabled:
+                # Painting resets a cell's colour even when its weight stays,
+                # and moving Start or End resets their old cells too.
+                self.flow_repaint.add(node.index)
+                for endpoint in (grid_instance.start_node, grid_instance.end_node):
+                    if endpoint:
+                        self.flow_repaint.add(endpoint.index)
+        grid_instance.set_node_type(node, brush_type)
+
     def reset_path(self):
         if not self.is_running_algo:
+            self.stop_live()
+            self.stop_flow()
+            trace_player.clear()
             grid_instance.reset_path()
             self.path_cost = None
+            self.race_results = None
+            self.status_message = None
+            self.metrics_visible = False
 
     def clear_all(self):
         if not self.is_running_algo:
+            self.stop_live()
+            self.stop_flow()
+            trace_player.clear()
             grid_instance.full_reset()
             self.path_cost = None
+            self.race_results = None
+            self.status_message = None
+            self.metrics_visible = False
+
+    def on_cell_changed(self, index):
+        if self.flow_enabled:
+            if index is None:
+                self.flow_invalid = True
+            else:
+                self.flow_changes.add(index)
+        if self.live_planner is None:
+            return
+        if index is None:
+            self.live_invalid = True
+        else:
+            self.live_changes.add(index)
+
+    def toggle_live(self):
+        if self.live_planner is not None:
+            self.stop_live()
+        elif not self.is_running_algo and grid_instance.start_node and grid_instance.end_node:
+            self.stop_flow()
+            trace_player.clear()
+            grid_instance.reset_path()
+            self.path_cost = None
+            self.metrics_visible = False
+            self.live_planner = DStarLite(grid_instance.weights, grid_instance.cols,
+                                          grid_instance.start_node.index, grid_instance.end_node.index)
+            self.live_invalid = False
+            self.live_changes.clear()
+            self.show_live_path(self.live_planner.compute())
+            self.ui_elements['btn_live'].text = "Live Replan: On"
+
+    def stop_live(self):
+        if self.live_planner is None:
+            return
+        self.live_planner = None
+        self.show_live_path(None)
+        self.path_cost = None
+        self.ui_elements['btn_live'].text = "Live Replan: Off"
+
+    def update_live(self):
+        # Repairs the planner with whatever was edited since the last frame.
+        start, end = grid_instance.start_node, grid_instance.end_node
+        if not start or not end:
+            if self.live_path or self.path_cost is not None:
+                self.show_live_path(None)
+            self.live_invalid = True
+            return
+
+        planner = self.live_planner
+        if self.live_invalid or end.index != planner.goal:
+            planner = self.live_planner = DStarLite(grid_instance.weights, grid_instance.cols, start.index, end.index)
+        elif not self.live_changes and start.index == planner.start:
+            return
+        else:
+            planner.update_cells(self.live_changes)
+            planner.move_start(start.index)
+        self.live_changes.clear()
+        self.live_invalid = False
+        self.show_live_path(planner.compute())
+
+    def show_live_path(self, result):
+        path = result.path if result else []
+        new_cells = set(path)
+        for index in self.live_path:
+            if index not in new_cells:
+                grid_instance.clear_paint(index)
+        path_color = pack_color(NODE_COLORS["PATH"])
+        for index in path[1:-1]:
+            grid_instance.paint(index, path_color)
+        self.live_path = path
+        self.path_cost = result.cost if result else None
+
+    def toggle_flow(self):
+        if self.flow_enabled:
+            self.stop_flow()
+        elif not self.is_running_algo and grid_instance.end_node:
+            self.stop_live()
+            trace_player.clear()
+            self.race_results = None
+            self.metrics_visible = False
+            self.flow_enabled = True
+            self.build_flow()
+            self.ui_elements['btn_flow'].text = "Flow Field: On"
+
+    def build_flow(self):
+        # One reverse Dijkstra from the End node on the worker thread, against
+        # a snapshot of the grid; update_flow() takes the field over when it is
+        # done. Edits made meanwhile are collected in flow_changes as usual.
+        # The grid keeps its colours until then: the heatmap paints over every
+        # cell.
+        end = grid_instance.end_node.index
+        snapshot = GridSnapshot(grid_instance.weights, grid_instance.cols, None, end)
+        self.flow_job = search_worker.start(build_flow_field, (snapshot.weights, snapshot.cols, snapshot.goal))
+        self.flow_field = None
+        self.flow_goal = end
+        self.flow_invalid = False
+        self.flow_changes.clear()
+        self.flow_repaint.clear()
+        self.flow_path = []
+        self.path_cost = None
+
+    def adopt_flow(self, message):
+        # The field was built on the snapshot; from here on it reads the live
+        # weights, and the cells edited since the snapshot are repaired in.
+        kind, value, _ = message
+        self.flow_job = None
+        if kind == "error":
+            raise value
+        field, self.flow_scale = value
+        field.weights = grid_instance.weights
+        field.update_cells(self.flow_changes)
+        self.flow_changes.clear()
+        self.flow_repaint.clear()
+        self.flow_repaired = field.expanded
+        self.flow_field = field
+        self.flow_painted = 0
+
+    def stop_flow(self):
+        if not self.flow_enabled:
+            return
+        if self.flow_job is not None:
+            self.flow_job.cancel()
+            self.flow_job = None
+        self.flow_enabled = False
+        self.flow_field = None
+        self.flow_path = []
+        grid_instance.reset_path()
+        self.path_cost = None
+        self.ui_elements['btn_flow'].text = "Flow Field: Off"
+
+    def update_flow(self):
+        # Repairs the field with whatever was edited since the last frame.
+        # Shades are scaled to the costs at the last full build.
+        end = grid_instance.end_node
+        if not end:
+            if self.flow_path or grid_instance.painted:
+                grid_instance.reset_path()
+                self.flow_path = []
+                self.path_cost = None
+            self.flow_invalid = True
+            return
+
+        if self.flow_invalid or end.index != self.flow_goal:
+            self.build_flow()
+            return
+        if self.flow_job is not None:
+            message = self.flow_job.poll()
+            if message is None:
+                if self.flow_job.cancelled:
+                    # Esc cancelled the build.
+                    self.stop_flow()
+                return
+            self.adopt_flow(message)
+
+        field = self.flow_field
+        start = grid_instance.start_node
+        painting = self.flow_painted < field.size
+        if painting:
+            # The full heatmap goes in FLOW_PAINT_CELLS cells a frame; edited
+            # cells past that point are painted when it gets there. The path
+            # is drawn again over each chunk.
+            self.paint_flow(range(self.flow_painted, min(field.size, self.flow_painted + FLOW_PAINT_CELLS)))
+            self.flow_painted += FLOW_PAINT_CELLS
+        if self.flow_changes:
+            expanded = field.expanded
+            changed = field.update_cells(self.flow_changes)
+            self.flow_repaired = field.expanded - expanded
+            self.flow_changes.clear()
+            self.flow_repaint |= changed
+        elif not painting and not self.flow_repaint and (start.index if start else None) == (self.flow_path[0] if self.flow_path else None):
+            return
+        self.paint_flow(self.flow_repaint)
+        self.flow_repaint.clear()
+        self.show_flow_path()
+
+    def paint_flow(self, cells):
+        dist, weights = self.flow_field.dist, grid_instance.weights
+        endpoints = {node.index for node in (grid_instance.start_node, grid_instance.end_node) if node}
+        last = len(FLOW_SHADES) - 1
+        for index in cells:
+            if index in endpoints:
+                continue
+            if weights[index] and dist[index] < INF:
+                grid_instance.paint(index, FLOW_SHADES[min(last, int(dist[index] * last / self.flow_scale))])
+            else:
+                grid_instance.clear_paint(index)
+
+    def show_flow_path(self):
+        # The Start node's path is read straight off the field.
+        old_path = self.flow_path
+        start = grid_instance.start_node
+        path = self.flow_field.path(start.index) if start else []
+        self.flow_path = path
+        self.paint_flow(old_path)
+        path_color = pack_color(NODE_COLORS["PATH"])
+        for index in path[1:-1]:
+            grid_instance.paint(index, path_color)
+        self.path_cost = int(self.flow_field.dist[start.index]) if path else None
+
+    def get_background(self):
+        # The panels never change, so they are drawn once onto a static surface.
+        if self.background is None:
+            self.background = pygame.Surface((WIDTH, HEIGHT))
+            self.background.fill(COLOR_GRAY_LIGHT)
+            self.ui_elements['bottom_panel'].draw(self.background)
+            self.ui_elements['side_panel'].draw(self.background)
+            self.ui_elements['info_panel'].draw(self.background)
+            self.needs_full_redraw = True
+        return self.background
 
 app_state = AppState()
 
-home_enter_button = Button(
-    WIDTH // 2 - 100, 
-    HEIGHT // 2, 
-    200, 60, 
-    "Enter", 
-    app_state.fonts['button'], 
-    lambda: None
-)
+home_enter_button = None
 
 def home_screen_loop(screen, events):
+    global home_enter_button
+    if home_enter_button is None:
+        home_enter_button = Button(
+            WIDTH // 2 - 100, 
+            HEIGHT // 2, 
+            200, 60, 
+            "Enter", 
+            app_state.fonts['button'], 
+            lambda: None
+        )
+
     for event in events:
         home_enter_button.handle_event(event)
         
@@ -113,7 +667,9 @@ def home_screen_loop(screen, events):
     screen.fill(COLOR_GRAY_DARK)
     draw_text(screen, "Shaam's Pathfinding Visualizer", app_state.fonts['title'], COLOR_WHITE, (WIDTH // 2, HEIGHT // 3))
     home_enter_button.draw(screen)
-    
+    app_state.needs_full_redraw = True
+    app_state.dirty_rects = None
+
     return Screen.HOME
 
 def visualizer_loop(screen, events):
@@ -123,58 +679,208 @@ def visualizer_loop(screen, events):
     return Screen.VISUALIZER
 
 def handle_visualizer_input(events):
+    if events:
+        app_state.ui_dirty = True
+
     for event in events:
         for key, element in app_state.ui_elements.items():
             if isinstance(element, Button):
                 element.handle_event(event)
 
-        if app_state.is_running_algo:
+        # Zooming and panning work while an algorithm runs too.
+        view = grid_instance.view
+        if event.type == pygame.MOUSEWHEEL and view.contains(pygame.mouse.get_pos()):
+            view.zoom_at(pygame.mouse.get_pos(), event.y)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 2 and view.contains(event.pos):
+            app_state.panning = True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 2:
+            app_state.panning = False
+        elif event.type == pygame.MOUSEMOTION and app_state.panning:
+            view.pan(*event.rel)
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_f:
+            view.fit(grid_instance.rows, grid_instance.cols)
+        elif event.type == pygame.KEYDOWN:
+            app_state.handle_replay_key(event)
+
+        if app_state.is_running_algo or app_state.panning:
             continue
 
         if pygame.mouse.get_pressed()[0]: # Left click
             node = grid_instance.get_node_from_pos(pygame.mouse.get_pos())
-            grid_instance.set_node_type(node, app_state.selected_brush)
+            app_state.paint_node(node, app_state.selected_brush)
 
         elif pygame.mouse.get_pressed()[2]: # Right click
             node = grid_instance.get_node_from_pos(pygame.mouse.get_pos())
-            grid_instance.set_node_type(node, "AIR")
+            app_state.paint_node(node, "AIR")
 
 def update_visualizer_state():
+    if app_state.live_planner is not None:
+        app_state.update_live()
+    if app_state.flow_enabled:
+        app_state.update_flow()
+
+    if app_state.race is not None:
+        app_state.update_race()
+        app_state.ui_dirty = True
+
     if app_state.is_running_algo and app_state.algorithm_iterator:
-        try:
-            result = next(app_state.algorithm_iterator)
-            if isinstance(result, (int, float)):
-                app_state.path_cost = result
-                app_state.is_running_algo = False
-                app_state.algorithm_iterator = None
-        except StopIteration:
+        finished, result = app_state.scheduler.advance(app_state.algorithm_iterator)
+        if isinstance(result, (int, float)):
+            app_state.path_cost = result
+        if finished:
             app_state.is_running_algo = False
             app_state.algorithm_iterator = None
+            app_state.replaying = False
+        app_state.ui_dirty = True
 
 def draw_visualizer(screen):
-    screen.fill(COLOR_GRAY_LIGHT)
-    grid_instance.draw(screen)
-    
+    background = app_state.get_background()
+    stats = stats_text()
+    stats_visible = stats is not None
+    rects = []
+
+    if app_state.needs_full_redraw or stats_visible != app_state.stats_visible:
+        screen.blit(background, (0, 0))
+        grid_instance.draw_cells(screen)
+        rects.append(screen.get_rect())
+        app_state.needs_full_redraw = False
+        app_state.stats_visible = stats_visible
+        app_state.ui_dirty = True
+    else:
+        rects.extend(grid_instance.draw_changes(screen))
+    if rects and app_state.flow_field is not None and grid_instance.view.size >= FLOW_ARROW_MIN_SIZE:
+        draw_flow_arrows(screen)
+        rects.append(grid_instance.rect())
+
+    if app_state.ui_dirty:
+        for key in ('bottom_panel', 'side_panel', 'info_panel'):
+            panel_rect = app_state.ui_elements[key].rect
+            screen.blit(background, panel_rect, panel_rect)
+            rects.append(panel_rect)
+        draw_panel_widgets(screen)
+        app_state.ui_dirty = False
+
+    if stats_visible and rects:
+        stats_panel = app_state.ui_elements['stats_panel']
+        stats_panel.draw(screen)
+        draw_text(screen, stats, app_state.fonts['button'], COLOR_WHITE, (WIDTH // 2, STATS_BAR_HEIGHT // 2))
+        rects.append(stats_panel.rect)
+
+    app_state.dirty_rects = rects
+
+def draw_flow_arrows(screen):
+    # Redrawn over every visible cell whenever any part of the grid was.
+    view, field = grid_instance.view, app_state.flow_field
+    size, cols, step = view.size, grid_instance.cols, field.step
+    shaft, head = size * 0.3, size * 0.15
+    first_row, end_row, first_col, end_col = view.visible_cells()
+    screen.set_clip(grid_instance.rect())
+    for row in range(first_row, end_row):
+        for col in range(first_col, end_col):
+            direction = step[row * cols + col]
+            if direction == NO_STEP:
+                continue
+            dx, dy = FLOW_VECTORS[direction]
+            x, y = view.cell_position(row, col)
+            center_x, center_y = x + size / 2, y + size / 2
+            tip = (center_x + dx * shaft, center_y + dy * shaft)
+            pygame.draw.line(screen, FLOW_ARROW_COLOR, (center_x - dx * shaft, center_y - dy * shaft), tip)
+            pygame.draw.lines(screen, FLOW_ARROW_COLOR, False, [
+                (tip[0] - dx * head - dy * head, tip[1] - dy * head + dx * head), tip,
+                (tip[0] - dx * head + dy * head, tip[1] - dy * head - dx * head)])
+    screen.set_clip(None)
+
+def stats_text():
+    if app_state.status_message:
+        return app_state.status_message
+    job = search_worker.job
+    if job is not None and job.running and job.elapsed >= SEARCH_PROGRESS_DELAY_MS / 1000:
+        progress = f"{len(job.trace)} trace events, " if job.trace is not None else ""
+        return f"Working in the background: {progress}{job.elapsed:.1f} s | Esc to cancel"
+    if app_state.flow_enabled:
+        if app_state.flow_field is None:
+            return "Flow Field to End | building..."
+        if not grid_instance.start_node:
+            cost = "no Start node"
+        elif app_state.path_cost is None:
+            cost = "unreachable"
+        else:
+            cost = app_state.path_cost
+        return f"Flow Field to End | Start cost: {cost} | last update: {app_state.flow_repaired} cells settled"
+    if trace_player.loaded and not trace_player.at_end and not app_state.is_running_algo:
+        return (f"Replay paused at step {trace_player.step}/{trace_player.last_step} | "
+                "Space play, Left/Right step, PgUp/PgDn jump, Home/End seek")
+    run = metrics_log.latest if app_state.metrics_visible else None
+    if run is not None:
+        result = run.result
+        if app_state.is_running_algo:
+            outcome = "Searching"
+        elif result.found:
+            outcome = f"Path Cost: {result.cost}"
+        else:
+            outcome = "No path"
+        return (f"{outcome} | {result.expanded} expanded | {result.pushes} pushed | {result.pops} popped | "
+                f"{result.stale} stale | max open {result.max_open} | {len(result.path)} cells | "
+                f"solve {run.phases['solve'] * 1000:.1f} ms")
+    if app_state.path_cost is not None:
+        return f"Path Cost: {app_state.path_cost:.2f}" if isinstance(app_state.path_cost, float) else f"Path Cost: {app_state.path_cost}"
+    if app_state.race_results:
+        fastest = min(app_state.race_results, key=lambda entry: entry.elapsed)
+        leanest = min(app_state.race_results, key=lambda entry: entry.result.expanded)
+        return (f"Race: fastest {ALGORITHM_LABELS[fastest.algorithm]} ({fastest.elapsed * 1000:.1f} ms), "
+                f"fewest expansions {ALGORITHM_LABELS[leanest.algorithm]} ({leanest.result.expanded})")
+    return None
+
+def draw_race_table(screen):
+    font = app_state.fonts['label']
+    x = INFO_PANEL_X + INFO_PANEL_WIDTH // 2
+    y = INFO_PANEL_Y + 20
+    if app_state.race is not None:
+        draw_text(screen, "Racing...", app_state.fonts['button'], COLOR_WHITE, (x, y))
+        return
+
+    draw_text(screen, "Race Results", app_state.fonts['button'], COLOR_WHITE, (x, y))
+    for entry in app_state.race_results:
+        y += 40
+        color = COLOR_YELLOW if entry.algorithm == app_state.race_current else COLOR_WHITE
+        result = entry.result
+        cost = result.cost if result.found else "no path"
+        draw_text(screen, ALGORITHM_LABELS[entry.algorithm], font, color, (x, y))
+        draw_text(screen, f"cost {cost} | {result.expanded} exp | {entry.elapsed * 1000:.1f} ms", font, color, (x, y + 16))
+
+def draw_metrics_table(screen, run):
+    font = app_state.fonts['label']
+    x = INFO_PANEL_X + INFO_PANEL_WIDTH // 2
+    y = INFO_PANEL_Y + 20
+    title = ALGORITHM_LABELS[run.algorithm] + (" (cached)" if run.cached else "")
+    draw_text(screen, title, app_state.fonts['button'], COLOR_WHITE, (x, y))
+    y += 10
+    for name, value in run.as_dict().items():
+        if name in ("algorithm", "rows", "cols", "cached") or value is None:
+            continue
+        y += 20
+        text = f"{value:.2f}" if isinstance(value, float) else str(value)
+        draw_text(screen, f"{name}: {text}", font, COLOR_WHITE, (x, y))
+
+def draw_panel_widgets(screen):
     for key, element in app_state.ui_elements.items():
-        element.draw(screen)
+        if isinstance(element, Button):
+            element.draw(screen)
 
     font = app_state.fonts['label']
-    labels = {
-        'brush_start': 'Start',
-        'brush_end': 'End',
-        'brush_wall': 'Wall',
-        'brush_air': 'Erase',
-        'brush_dirt': f'Dirt ({NODE_WEIGHTS["DIRT"]})',
-        'brush_mud': f'Mud ({NODE_WEIGHTS["MUD"]})',
-        'brush_tar': f'Tar ({NODE_WEIGHTS["TAR"]})',
-    }
-    for key, text in labels.items():
+    for key, text in BRUSH_LABELS.items():
         if key in app_state.ui_elements:
             btn = app_state.ui_elements[key]
             draw_text(screen, text, font, COLOR_WHITE, (btn.rect.centerx, btn.rect.bottom + 10))
 
-    if app_state.path_cost is not None:
-        stats_panel = Panel(0, 0, WIDTH, STATS_BAR_HEIGHT, COLOR_GRAY_DARK)
-        stats_panel.draw(screen)
-        cost_text = f"Path Cost: {app_state.path_cost:.2f}" if isinstance(app_state.path_cost, float) else f"Path Cost: {app_state.path_cost}"
-        draw_text(screen, cost_text, app_state.fonts['button'], COLOR_WHITE, (WIDTH // 2, STATS_BAR_HEIGHT // 2))
\ No newline at end of file
+    if app_state.race is not None or app_state.race_results:
+        draw_race_table(screen)
+    elif app_state.metrics_visible and metrics_log.latest:
+        draw_metrics_table(screen, metrics_log.latest)
+
+    export_btn = app_state.ui_elements['btn_export_json']
+    draw_text(screen, "Export metrics", font, COLOR_WHITE, (SIDE_PANEL_X + SIDE_PANEL_WIDTH // 2, export_btn.rect.top - 12))
+
+    speed_btn = app_state.ui_elements['btn_speed']
+    rate_text = f"Steps/s: {app_state.scheduler.steps_per_second}" if app_state.is_running_algo else "Steps/s: -"
+    draw_text(screen, rate_text, font, COLOR_WHITE, (speed_btn.rect.centerx, speed_btn.rect.bottom + 12))
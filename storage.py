@@ -0,0 +1,98 @@
+import mmap
+import struct
+from config import NODE_TYPES
+
+# Compact on-disk grid format: a fixed 32 byte header followed by one byte per
+# cell holding its type code (config.NODE_TYPES), row-major.
+#
+#   magic "PFGR" | version u8 | 3 pad bytes | rows u32 | cols u32 | start i64 | end i64
+#
+# start and end are cell indices, or -1 when the grid has none. Files are read
+# through mmap, so opening a large map costs nothing up front and every
+# process that opens the same file shares the pages read-only.
+
+MAGIC = b"PFGR"
+VERSION = 1
+HEADER = struct.Struct("<4sB3xIIqq")
+# Cell bytes checked per slice when a file is opened.
+CHECK_CHUNK = 1 << 20
+VALID_CODES = bytes(range(len(NODE_TYPES)))
+
+def write_header(f, rows, cols, start=None, end=None):
+    f.write(HEADER.pack(MAGIC, VERSION, rows, cols,
+                        -1 if start is None else start, -1 if end is None else end))
+
+def save(path, grid):
+    with open(path, "wb") as f:
+        write_header(f, grid.rows, grid.cols,
+                     grid.start_node.index if grid.start_node else None,
+                     grid.end_node.index if grid.end_node else None)
+        f.write(grid.types)
+
+class MapFile:
+    # A read-only, memory-mapped grid file. `types` is a zero-copy view of the
+    # cell bytes; it is only valid until close().
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"{path}: not a grid file")
+
+        if len(self.map) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path}: not a grid file")
+        magic, version, self.rows, self.cols, start, end = HEADER.unpack_from(self.map)
+        size = self.rows * self.cols
+        if (magic != MAGIC or version != VERSION or not self.rows or not self.cols
+                or len(self.map) != HEADER.size + size or start >= size or end >= size):
+            self.close()
+            raise ValueError(f"{path}: not a grid file")
+        self.path = path
+        self.start = None if start < 0 else start
+        self.end = None if end < 0 else end
+        self.types = memoryview(self.map)[HEADER.size:]
+
+    def validate(self):
+        # Reads every cell, so opening a map stays free and only callers about
+        # to copy the cells anyway pay for it.
+        for offset in range(HEADER.size, len(self.map), CHECK_CHUNK):
+            if self.map[offset:offset + CHECK_CHUNK].translate(None, VALID_CODES):
+                raise ValueError(f"{self.path}: unknown cell type")
+
+    def weights(self):
+        # Engine-ready weights; one bytes.translate over the mapped cells.
+        from grid import WEIGHT_TABLE
+        return self.types.tobytes().translate(WEIGHT_TABLE)
+
+    def close(self):
+        if getattr(self, "types", None) is not None:
+            self.types.release()
+            self.types = None
+        if not self.map.closed:
+            try:
+                self.map.close()
+            except BufferError:
+                # A slice of types is still referenced (say, by a traceback);
+                # the mapping is freed along with it.
+                pass
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_map(path):
+    return MapFile(path)
+
+def load(path, grid):
+    with open_map(path) as map_file:
+        # Checked before the grid is touched, so a corrupt file never leaves
+        # it half-written.
+        map_file.validate()
+        if (map_file.rows, map_file.cols) != (grid.rows, grid.cols):
+            grid.init_grid(map_file.rows, map_file.cols)
+        grid.load_types(map_file.types, map_file.start, map_file.end)
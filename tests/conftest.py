@@ -0,0 +1,45 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Cell weights the visualizer uses (AIR, DIRT, MUD, TAR), 0 for a wall.
+WEIGHTS = [1, 5, 20, 100]
+
+@pytest.fixture
+def grid():
+    # The visualizer's Grid singleton, put back as it was after the test.
+    from grid import grid_instance
+    rows, cols = grid_instance.rows, grid_instance.cols
+    types = bytes(grid_instance.types)
+    start = grid_instance.start_node.index if grid_instance.start_node else None
+    end = grid_instance.end_node.index if grid_instance.end_node else None
+    yield grid_instance
+    grid_instance.init_grid(rows, cols)
+    grid_instance.load_types(types, start, end)
+
+@pytest.fixture
+def random_weights():
+    # make(seed, rows, cols): a seeded weights bytearray with about `walls` of
+    # the cells blocked, and the rest weighted unless weighted=False.
+    def make(seed, rows, cols, walls=0.25, weighted=True):
+        rng = random.Random(seed)
+        costs = WEIGHTS if weighted else WEIGHTS[:1]
+        return bytearray(0 if rng.random() < walls else rng.choice(costs) for _ in range(rows * cols))
+    return make
+
+@pytest.fixture
+def check_path():
+    # check(weights, cols, path, start, goal, cost): path is a chain of open,
+    # 4-adjacent cells from start to goal whose entered weights add up to cost.
+    def check(weights, cols, path, start, goal, cost):
+        assert path[0] == start and path[-1] == goal
+        for current, following in zip(path, path[1:]):
+            step = abs(following - current)
+            assert step == cols or (step == 1 and following // cols == current // cols)
+        assert all(weights[index] for index in path)
+        assert sum(weights[index] for index in path[1:]) == cost
+    return check
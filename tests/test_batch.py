@@ -0,0 +1,29 @@
+import batch
+import storage
+
+def write_open_map(path, rows, cols):
+    with open(path, "wb") as f:
+        storage.write_header(f, rows, cols)
+        f.write(bytes(rows * cols))
+    return str(path)
+
+def test_column_past_the_edge_is_an_error(tmp_path):
+    path = write_open_map(tmp_path / "open.pfg", 50, 41)
+    record = batch.run_job(path, "astar", (0, 0), (0, 45))
+    assert "outside" in record["error"]
+    assert "cost" not in record
+
+def test_row_and_index_ranges(tmp_path):
+    path = write_open_map(tmp_path / "open.pfg", 3, 4)
+    assert "outside" in batch.run_job(path, "astar", (3, 0), 0)["error"]
+    assert "outside" in batch.run_job(path, "astar", 0, 12)["error"]
+    record = batch.run_job(path, "astar", (0, 0), (2, 3))
+    assert record.get("error") is None
+    assert (record["goal"], record["cost"]) == (11, 5)
+
+def test_unknown_cell_code_is_an_error(tmp_path):
+    path = tmp_path / "bad.pfg"
+    with open(path, "wb") as f:
+        storage.write_header(f, 2, 2)
+        f.write(bytes([0, 0, 0, 9]))
+    assert "unknown cell type" in batch.run_job(str(path), "astar", 0, 1)["error"]
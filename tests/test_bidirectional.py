@@ -0,0 +1,28 @@
+import random
+
+import pytest
+
+import engine
+
+ROWS, COLS = 17, 15
+
+@pytest.mark.parametrize("solver", [engine.bidirectional_a_star, engine.bidirectional_dijkstra])
+@pytest.mark.parametrize("seed", range(16))
+def test_bidirectional_cost_matches_dijkstra(solver, seed, random_weights, check_path):
+    weights = random_weights(seed, ROWS, COLS)
+    rng = random.Random(seed)
+    for _ in range(8):
+        start, goal = rng.randrange(len(weights)), rng.randrange(len(weights))
+        expected = engine.dijkstra(weights, COLS, start, goal)
+        result = solver(weights, COLS, start, goal)
+        assert result.cost == expected.cost
+        if expected.found:
+            check_path(weights, COLS, result.path, start, goal, result.cost)
+
+@pytest.mark.parametrize("solver", [engine.bidirectional_a_star, engine.bidirectional_dijkstra])
+def test_trace_uses_both_directions(solver):
+    weights = bytes([1]) * (ROWS * COLS)
+    trace = []
+    solver(weights, COLS, 0, ROWS * COLS - 1, trace)
+    kinds = {event & 7 for event in trace}
+    assert {engine.TRACE_CLOSE, engine.TRACE_CLOSE_REVERSE} <= kinds
@@ -0,0 +1,53 @@
+from array import array
+
+import engine
+from cache import ResultCache
+
+def result(cells):
+    return engine.SearchResult(list(range(cells)), cells - 1, cells)
+
+def trace(events):
+    return array('I', bytes(4 * events))
+
+def test_least_recently_used_entry_goes_first():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", result(2))
+    cache.put("b", result(2))
+    cache.get("a")
+    cache.put("c", result(2))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert (cache.hits, cache.misses) == (3, 1)
+
+def test_traces_count_against_the_byte_limit():
+    cache = ResultCache(max_bytes=1000)
+    cache.put("a", result(10), trace(100))
+    cache.put("b", result(10), trace(100))
+    assert len(cache) == 2 and cache.nbytes == 2 * (40 + 400)
+    cache.put("c", result(10), trace(100))
+    assert cache.get("a") is None
+    assert cache.nbytes == 2 * (40 + 400) <= cache.max_bytes
+
+def test_replacing_an_entry_frees_its_bytes():
+    cache = ResultCache(max_bytes=1000)
+    cache.put("a", result(10), trace(200))
+    cache.put("a", result(10), trace(10))
+    assert len(cache) == 1 and cache.nbytes == 40 + 40
+
+def test_an_entry_over_the_limit_is_returned_but_not_kept():
+    cache = ResultCache(max_bytes=1000)
+    cache.put("a", result(10))
+    entry = cache.put("b", result(10), trace(1000))
+    assert entry.trace is not None
+    assert len(cache) == 0 and cache.nbytes == 0
+
+def test_solve_reuses_results_per_content_hash(random_weights):
+    weights, cols = random_weights(1, 12, 12), 12
+    weights[0] = weights[-1] = 1
+    cache = ResultCache()
+    first = cache.solve("astar", weights, cols, 0, len(weights) - 1, content_hash=1)
+    assert cache.solve("astar", weights, cols, 0, len(weights) - 1, content_hash=1) is first
+    assert cache.solve("astar", weights, cols, 0, len(weights) - 1, content_hash=2) is not first
+    # A hit without a trace is solved again when a trace is asked for.
+    traced = cache.solve("astar", weights, cols, 0, len(weights) - 1, content_hash=1, record_trace=True)
+    assert traced.trace and traced.result.cost == first.result.cost
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+import engine
+from flowfield import FlowField
+
+ROWS, COLS = 16, 18
+# A wall or one of the visualizer's cell weights.
+EDITS = [0, 1, 5, 20, 100]
+
+def assert_matches_rebuild(field, weights, cols, goal, check_path):
+    rebuilt = FlowField(bytes(weights), cols, goal)
+    assert field.dist == rebuilt.dist
+    assert field.dist == engine.distance_table(weights, cols, goal, reverse=True)
+    for start in range(0, len(weights), 7):
+        path = field.path(start)
+        if field.dist[start] < engine.INF:
+            check_path(weights, cols, path, start, goal, field.dist[start])
+        else:
+            assert path == []
+
+@pytest.mark.parametrize("seed", range(12))
+def test_repairs_match_a_rebuild(seed, random_weights, check_path):
+    weights = random_weights(seed, ROWS, COLS)
+    rng = random.Random(seed)
+    goal = rng.randrange(len(weights))
+    weights[goal] = 1
+    field = FlowField(weights, COLS, goal)
+    assert_matches_rebuild(field, weights, COLS, goal, check_path)
+    for _ in range(15):
+        edited = set()
+        for _ in range(rng.randint(1, 8)):
+            index = rng.randrange(len(weights))
+            if index != goal:
+                weights[index] = rng.choice(EDITS)
+                edited.add(index)
+        before = field.dist[:]
+        changed = field.update_cells(edited)
+        assert_matches_rebuild(field, weights, COLS, goal, check_path)
+        # Every cell whose cost moved is reported for repainting.
+        assert {index for index in range(len(weights)) if before[index] != field.dist[index]} <= changed
+
+def test_field_built_on_a_copy_repairs_onto_live_weights(random_weights, check_path):
+    # The visualizer builds on a snapshot, then points the field at the grid's
+    # own buffer and reports the cells edited in between.
+    weights = random_weights(2, ROWS, COLS)
+    goal = 0
+    weights[goal] = 1
+    field = FlowField(bytes(weights), COLS, goal)
+    weights[5] = 0
+    weights[40] = 100
+    weights[41] = 1
+    field.weights = weights
+    field.update_cells({5, 40, 41})
+    assert_matches_rebuild(field, weights, COLS, goal, check_path)
+
+def test_unchanged_cells_are_not_reported(random_weights):
+    weights = random_weights(3, ROWS, COLS)
+    weights[0] = 1
+    field = FlowField(weights, COLS, 0)
+    assert field.update_cells({10, 20}) == set()
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+import engine
+from frontiers import FRONTIERS, FRONTIER_NAMES
+
+ROWS, COLS = 15, 18
+
+@pytest.mark.parametrize("solver", [engine.a_star, engine.dijkstra])
+@pytest.mark.parametrize("frontier", FRONTIER_NAMES)
+@pytest.mark.parametrize("seed", range(10))
+def test_frontier_cost_matches_dijkstra(solver, frontier, seed, random_weights, check_path):
+    weights = random_weights(seed, ROWS, COLS)
+    rng = random.Random(seed)
+    for _ in range(8):
+        start, goal = rng.randrange(len(weights)), rng.randrange(len(weights))
+        expected = engine.dijkstra(weights, COLS, start, goal)
+        result = solver(weights, COLS, start, goal, frontier=frontier)
+        assert result.cost == expected.cost
+        if expected.found:
+            check_path(weights, COLS, result.path, start, goal, result.cost)
+
+@pytest.mark.parametrize("name", list(FRONTIERS))
+def test_pops_come_out_in_key_order(name):
+    # Used the way the solvers use it: popped items are closed and never pushed
+    # again, stale entries for them are skipped, and every key lies within
+    # max_step of the last key popped.
+    rng = random.Random(3)
+    frontier = FRONTIERS[name](200, 10)
+    queued, closed, popped = {}, set(), [0]
+    for _ in range(600):
+        if queued and rng.random() < 0.4:
+            item = frontier.pop()
+            if item not in closed:
+                closed.add(item)
+                popped.append(queued.pop(item))
+        else:
+            item, key = rng.randrange(200), popped[-1] + rng.randrange(11)
+            if item not in closed and key < queued.get(item, key + 1):
+                queued[item] = key
+                frontier.push(item, key)
+    assert len(popped) > 100
+    assert popped == sorted(popped)
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+import engine
+from hpa import ClusterGraph, HierarchyCache
+
+ROWS, COLS = 23, 27
+
+@pytest.mark.parametrize("cluster_size", [4, 5, 10])
+@pytest.mark.parametrize("seed", range(8))
+def test_paths_are_valid_and_found_whenever_one_exists(cluster_size, seed, random_weights, check_path):
+    # HPA* is near-optimal, so its cost is only bounded below by Dijkstra's.
+    weights = random_weights(seed, ROWS, COLS, walls=0.2)
+    graph = ClusterGraph(weights, COLS, cluster_size)
+    rng = random.Random(seed)
+    for _ in range(8):
+        start, goal = rng.randrange(len(weights)), rng.randrange(len(weights))
+        expected = engine.dijkstra(weights, COLS, start, goal)
+        result = graph.search(start, goal)
+        assert result.found == expected.found
+        if expected.found:
+            check_path(weights, COLS, result.path, start, goal, result.cost)
+            assert result.cost >= expected.cost
+
+@pytest.mark.parametrize("seed", range(6))
+def test_edited_cells_drop_their_clusters(seed, random_weights, check_path):
+    weights = random_weights(seed, ROWS, COLS, walls=0.2)
+    graph = ClusterGraph(weights, COLS, 5)
+    rng = random.Random(seed)
+    for _ in range(8):
+        start, goal = rng.randrange(len(weights)), rng.randrange(len(weights))
+        graph.search(start, goal)
+        for _ in range(5):
+            index = rng.randrange(len(weights))
+            weights[index] = rng.choice([0, 1, 5])
+            graph.invalidate_cell(index)
+        expected = engine.dijkstra(weights, COLS, start, goal)
+        result = graph.search(start, goal)
+        assert result.found == expected.found
+        if expected.found:
+            check_path(weights, COLS, result.path, start, goal, result.cost)
+
+def test_snapshot_searches_a_copy_and_hands_back_its_clusters(random_weights):
+    weights = random_weights(1, ROWS, COLS, walls=0.1)
+    weights[0] = weights[-1] = 1
+    cache = HierarchyCache(5)
+    copy = cache.snapshot(weights, COLS)
+    assert copy.weights == weights and copy.weights is not weights
+    copy.search(0, len(weights) - 1)
+    built = set(copy.clusters)
+    assert built and set(cache.snapshot(weights, COLS).clusters) >= built
+
+    # An edit in between means the copy's clusters may be stale.
+    copy = cache.snapshot(weights, COLS)
+    copy.search(0, len(weights) - 1)
+    cache.cell_changed(0)
+    assert cache.graph.cluster_of(0) not in cache.snapshot(weights, COLS).clusters
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+import engine
+from incremental import DStarLite
+
+ROWS, COLS = 14, 16
+# A wall or one of the visualizer's cell weights.
+EDITS = [0, 1, 5, 20, 100]
+
+@pytest.mark.parametrize("seed", range(12))
+def test_repairs_match_a_fresh_plan(seed, random_weights, check_path):
+    # Edits cells in place and moves the start between plans; each repaired
+    # plan must cost what a new planner and Dijkstra find on the edited grid.
+    weights = random_weights(seed, ROWS, COLS)
+    rng = random.Random(seed)
+    start, goal = rng.randrange(len(weights)), rng.randrange(len(weights))
+    weights[start] = weights[goal] = 1
+    planner = DStarLite(weights, COLS, start, goal)
+    planner.compute()
+    for _ in range(10):
+        edited = set()
+        for _ in range(rng.randint(1, 6)):
+            index = rng.randrange(len(weights))
+            if index not in (planner.start, goal):
+                weights[index] = rng.choice(EDITS)
+                edited.add(index)
+        planner.update_cells(edited)
+        if rng.random() < 0.5:
+            path = planner.result().path
+            if len(path) > 1:
+                planner.move_start(path[1])
+        result = planner.compute()
+
+        expected = engine.dijkstra(weights, COLS, planner.start, goal)
+        assert result.cost == expected.cost
+        assert DStarLite(weights, COLS, planner.start, goal).compute().cost == expected.cost
+        if expected.found:
+            check_path(weights, COLS, result.path, planner.start, goal, result.cost)
+
+def test_repair_expands_less_than_a_fresh_plan():
+    weights = bytearray([1]) * (ROWS * COLS)
+    goal = ROWS * COLS - 1
+    planner = DStarLite(weights, COLS, 0, goal)
+    planner.compute()
+    weights[goal - COLS - 1] = 0
+    planner.update_cells([goal - COLS - 1])
+    repair = planner.compute()
+    assert repair.cost == ROWS + COLS - 2
+    assert planner.expanded < DStarLite(weights, COLS, 0, goal).compute().expanded
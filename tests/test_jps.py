@@ -0,0 +1,27 @@
+import random
+
+import pytest
+
+import engine
+
+ROWS, COLS = 16, 19
+
+@pytest.mark.parametrize("seed", range(24))
+def test_jps_cost_matches_dijkstra(seed, random_weights, check_path):
+    # Odd seeds give unit-cost grids, where jumps cover whole runs.
+    weights = random_weights(seed, ROWS, COLS, weighted=seed % 2 == 0)
+    rng = random.Random(seed)
+    for _ in range(8):
+        start, goal = rng.randrange(len(weights)), rng.randrange(len(weights))
+        expected = engine.dijkstra(weights, COLS, start, goal)
+        result = engine.jps(weights, COLS, start, goal)
+        assert result.cost == expected.cost
+        if expected.found:
+            check_path(weights, COLS, result.path, start, goal, result.cost)
+
+def test_jps_on_an_open_grid_expands_less_than_dijkstra():
+    weights = bytes([1]) * (ROWS * COLS)
+    goal = ROWS * COLS - 1
+    result = engine.jps(weights, COLS, 0, goal)
+    assert result.cost == ROWS + COLS - 2
+    assert result.expanded < engine.dijkstra(weights, COLS, 0, goal).expanded
@@ -0,0 +1,44 @@
+from collections import deque
+
+import pytest
+
+import mazes
+
+SIZES = [(3, 3), (5, 4), (21, 31), (20, 30)]
+
+def open_graph(codes, rows, cols):
+    # The open cells and the number of edges between 4-adjacent ones.
+    cells = {index for index, code in enumerate(codes) if code == mazes.AIR}
+    edges = sum((index + 1 in cells and (index + 1) % cols != 0) + (index + cols in cells) for index in cells)
+    return cells, edges
+
+def connected(cells, cols):
+    first = next(iter(cells))
+    seen, queue = {first}, deque([first])
+    while queue:
+        index = queue.popleft()
+        for neighbor in (index - cols, index + cols, index - 1, index + 1):
+            if neighbor in cells and neighbor not in seen and (neighbor // cols == index // cols or abs(neighbor - index) == cols):
+                seen.add(neighbor)
+                queue.append(neighbor)
+    return len(seen) == len(cells)
+
+@pytest.mark.parametrize("algorithm", mazes.GENERATORS)
+@pytest.mark.parametrize("rows, cols", SIZES)
+@pytest.mark.parametrize("seed", range(3))
+def test_mazes_are_perfect(algorithm, rows, cols, seed):
+    # A perfect maze is a spanning tree over its rooms: the open cells are
+    # connected and have exactly one edge fewer than cells, so no loops.
+    codes = mazes.generate(algorithm, rows, cols, seed)
+    assert len(codes) == rows * cols
+    assert set(codes) <= {mazes.AIR, mazes.WALL}
+    cells, edges = open_graph(codes, rows, cols)
+    rooms = {(2 * row + 1) * cols + 2 * col + 1 for row in range((rows - 1) // 2) for col in range((cols - 1) // 2)}
+    assert rooms <= cells
+    assert connected(cells, cols)
+    assert edges == len(cells) - 1
+
+@pytest.mark.parametrize("algorithm", mazes.GENERATORS)
+def test_seed_fixes_the_maze(algorithm):
+    assert mazes.generate(algorithm, 21, 21, 7) == mazes.generate(algorithm, 21, 21, 7)
+    assert mazes.generate(algorithm, 21, 21, 7) != mazes.generate(algorithm, 21, 21, 8)
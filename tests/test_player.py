@@ -0,0 +1,81 @@
+import random
+from array import array
+
+import pytest
+
+import engine
+import player
+from player import TracePlayer
+
+ROWS, COLS = 12, 14
+COLORS = [10, 11, 12, 13, 14]
+
+@pytest.fixture
+def recorded(grid):
+    # A grid with a few walls and an A* trace recorded on it.
+    rng = random.Random(5)
+    codes = bytes(1 if rng.random() < 0.2 else 0 for _ in range(ROWS * COLS))
+    grid.init_grid(ROWS, COLS)
+    grid.load_types(codes)
+    start, goal = 0, ROWS * COLS - 1
+    grid.set_cell_type(start, "AIR")
+    grid.set_cell_type(goal, "AIR")
+    trace = array('I')
+    result = engine.a_star(grid.weights, COLS, start, goal, trace)
+    assert result.found
+    return grid, trace, result
+
+def load(grid, trace, result):
+    tracer = TracePlayer(grid, COLORS)
+    tracer.load(trace, result.path[0], result.path[-1], result.path, result.cost)
+    return tracer
+
+def test_seeking_back_restores_the_colours(recorded):
+    grid, trace, result = recorded
+    before = bytes(grid.colors)
+    tracer = load(grid, trace, result)
+    tracer.seek(tracer.last_step)
+    assert bytes(grid.colors) != before
+    for index in result.path[1:-1]:
+        assert grid.colors[index] == COLORS[player.TRACE_PATH]
+    tracer.seek(tracer.path_step // 2)
+    tracer.seek(0)
+    assert bytes(grid.colors) == before
+
+def test_seeking_matches_stepping(recorded):
+    grid, trace, result = recorded
+    tracer = load(grid, trace, result)
+    snapshots = [bytes(grid.colors)]
+    for _ in tracer.steps():
+        snapshots.append(bytes(grid.colors))
+    assert len(snapshots) == tracer.last_step + 1
+    for step in random.Random(1).sample(range(tracer.last_step + 1), 20) + [0, tracer.last_step]:
+        tracer.seek(step)
+        assert bytes(grid.colors) == snapshots[step]
+
+def test_each_step_starts_at_a_closed_cell(recorded):
+    grid, trace, result = recorded
+    tracer = load(grid, trace, result)
+    closes = [position for position, event in enumerate(trace) if position and event & 7 == engine.TRACE_CLOSE]
+    assert list(tracer.stops[1:tracer.path_step]) == closes
+    assert tracer.stops[tracer.path_step] == len(trace)
+    assert tracer.last_step - tracer.path_step == len(result.path) - 2
+
+def test_extending_in_slices_matches_one_load(recorded):
+    grid, trace, result = recorded
+    whole = load(grid, trace, result)
+    sliced = TracePlayer(grid, COLORS)
+    sliced.begin(result.path[0], result.path[-1])
+    for offset in range(0, len(trace), 7):
+        sliced.extend(trace[offset:offset + 7])
+    sliced.finish(result.path, result.cost)
+    assert (sliced.events, sliced.stops, sliced.path_step) == (whole.events, whole.stops, whole.path_step)
+
+def test_save_and_load_round_trip(recorded, tmp_path):
+    grid, trace, result = recorded
+    tracer = load(grid, trace, result)
+    path = tmp_path / "trace.pft"
+    player.save(path, tracer, ROWS, COLS, grid.content_hash())
+    rows, cols, start, goal, content_hash, saved_trace, cells = player.load(path)
+    assert (rows, cols, start, goal, content_hash) == (ROWS, COLS, result.path[0], result.path[-1], grid.content_hash())
+    assert saved_trace == trace and list(cells) == result.path
@@ -0,0 +1,38 @@
+import pytest
+
+import storage
+
+def write_map(path, rows, cols, cells):
+    with open(path, "wb") as f:
+        storage.write_header(f, rows, cols)
+        f.write(bytes(cells))
+
+def test_out_of_range_code_is_rejected_before_loading(tmp_path, grid):
+    grid.init_grid(3, 3)
+    before = (bytes(grid.types), bytes(grid.weights), bytes(grid.colors))
+    path = tmp_path / "bad.pfg"
+    write_map(path, 4, 4, [0] * 15 + [9])
+    with pytest.raises(ValueError):
+        storage.load(path, grid)
+    assert (bytes(grid.types), bytes(grid.weights), bytes(grid.colors)) == before
+
+def test_opening_checks_only_the_header(tmp_path):
+    path = tmp_path / "bad.pfg"
+    write_map(path, 2, 2, [0, 0, 0, 9])
+    with storage.open_map(path) as map_file:
+        assert (map_file.rows, map_file.cols) == (2, 2)
+        with pytest.raises(ValueError):
+            map_file.validate()
+
+def test_empty_dimensions_are_rejected(tmp_path):
+    path = tmp_path / "empty.pfg"
+    write_map(path, 0, 5, [])
+    with pytest.raises(ValueError):
+        storage.open_map(path)
+
+def test_valid_map_round_trips(tmp_path, grid):
+    path = tmp_path / "good.pfg"
+    write_map(path, 2, 3, [0, 1, 4, 5, 6, 0])
+    storage.load(path, grid)
+    assert (grid.rows, grid.cols) == (2, 3)
+    assert bytes(grid.types) == bytes([0, 1, 4, 5, 6, 0])
@@ -1,5 +1,39 @@
 import pygame
-from config import COLOR_BLUE, COLOR_WHITE, COLOR_GRAY_DARK, COLOR_BLACK
+from collections import OrderedDict
+from config import COLOR_BLUE, COLOR_WHITE, COLOR_GRAY_DARK, COLOR_BLACK, TEXT_CACHE_SIZE
+
+class TextCache:
+    # Rendered text surfaces keyed by (font, text, color). Most of the UI text
+    # is the same from frame to frame, so rasterising it once is enough; the
+    # least recently used surfaces are dropped past max_entries so changing
+    # strings like timings can't grow the cache without bound.
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def render(self, font, text, color):
+        key = (font, text, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+text_cache = TextCache()
 
 class Button:
     def __init__(self, x, y, width, height, text, font, callback):
@@ -11,6 +45,8 @@ class Button:
         self.text_color = COLOR_WHITE
         self.is_hovered = False
         self.is_selected = False
+        self._face = None
+        self._label = None
 
     def handle_event(self, event):
         if event.type == pygame.MOUSEMOTION:
@@ -19,15 +55,28 @@ class Button:
             if self.callback:
                 self.callback()
 
+    def _face_color(self, is_selected):
+        # Recomputed only when the base color or the selected/hover state changes.
+        key = (self.color, is_selected, self.is_hovered)
+        if self._face is None or self._face[0] != key:
+            color = tuple(min(c + 40, 255) for c in self.color) if is_selected else self.color
+            color = tuple(min(c + 20, 255) for c in color) if self.is_hovered else color
+            self._face = (key, color)
+        return self._face[1]
+
+    def _text_surface(self):
+        # Rendered and centred again only when the text (or its color) changes.
+        key = (self.text, self.text_color)
+        if self._label is None or self._label[0] != key:
+            text_surf = self.font.render(self.text, True, self.text_color)
+            self._label = (key, text_surf, text_surf.get_rect(center=self.rect.center))
+        return self._label[1], self._label[2]
+
     def draw(self, screen, is_selected=False):
-        color = tuple(min(c + 40, 255) for c in self.color) if is_selected else self.color
-        color = tuple(min(c + 20, 255) for c in color) if self.is_hovered else color
-        
-        pygame.draw.rect(screen, color, self.rect, border_radius=8)
-        
+        pygame.draw.rect(screen, self._face_color(is_selected), self.rect, border_radius=8)
+
         if self.text:
-            text_surf = self.font.render(self.text, True, self.text_color)
-            text_rect = text_surf.get_rect(center=self.rect.center)
+            text_surf, text_rect = self._text_surface()
             screen.blit(text_surf, text_rect)
 
 class Panel:
@@ -40,6 +89,6 @@ class Panel:
         pygame.draw.rect(screen, COLOR_BLACK, self.rect, 2)
 
 def draw_text(screen, text, font, color, center_pos):
-    text_surf = font.render(text, True, color)
+    text_surf = text_cache.render(font, text, color)
     text_rect = text_surf.get_rect(center=center_pos)
-    screen.blit(text_surf, text_rect)
\ No newline at end of file
+    screen.blit(text_surf, text_rect)
@@ -0,0 +1,111 @@
+from config import GRID_TOP_LEFT_X, GRID_TOP_LEFT_Y, GRID_WIDTH, GRID_HEIGHT, ZOOM_SIZES, ZOOM_STEPS
+
+# The camera over the grid panel. A zoom level is a pair (size, step): size
+# screen pixels per cell, or, when zoomed out past one pixel per cell, step
+# cells per screen pixel. Both are whole numbers, so cell edges always fall on
+# pixel boundaries. origin_x/origin_y is the world pixel shown at the panel's
+# top-left corner, where world pixels are cell coordinates times size // step.
+
+ZOOM_LEVELS = [(1, step) for step in ZOOM_STEPS] + [(size, 1) for size in ZOOM_SIZES]
+
+class Viewport:
+    def __init__(self, left=GRID_TOP_LEFT_X, top=GRID_TOP_LEFT_Y, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.rows = 0
+        self.cols = 0
+        self.level = len(ZOOM_LEVELS) - 1
+        self.origin_x = 0
+        self.origin_y = 0
+        self.version = 0
+
+    @property
+    def size(self):
+        return ZOOM_LEVELS[self.level][0]
+
+    @property
+    def step(self):
+        return ZOOM_LEVELS[self.level][1]
+
+    def world_width(self):
+        return self.cols * self.size // self.step
+
+    def world_height(self):
+        return self.rows * self.size // self.step
+
+    def fit(self, rows, cols):
+        # Picks the largest zoom at which the whole grid fits in the panel.
+        self.rows, self.cols = rows, cols
+        self.level = 0
+        for level, (size, step) in enumerate(ZOOM_LEVELS):
+            if cols * size // step <= self.width and rows * size // step <= self.height:
+                self.level = level
+        self.origin_x = self.origin_y = 0
+        self.version += 1
+
+    def _clamp(self):
+        # Grids smaller than the panel stay anchored at its top-left corner.
+        self.origin_x = max(0, min(self.origin_x, self.world_width() - self.width))
+        self.origin_y = max(0, min(self.origin_y, self.world_height() - self.height))
+
+    def zoom_at(self, pos, direction):
+        # Zooms one level in (direction > 0) or out, keeping the cell under
+        # pos where it is on screen.
+        level = max(0, min(len(ZOOM_LEVELS) - 1, self.level + (1 if direction > 0 else -1)))
+        if level == self.level:
+            return
+        x, y = pos[0] - self.left, pos[1] - self.top
+        cell_x = (self.origin_x + x) * self.step / self.size
+        cell_y = (self.origin_y + y) * self.step / self.size
+        self.level = level
+        self.origin_x = int(cell_x * self.size / self.step) - x
+        self.origin_y = int(cell_y * self.size / self.step) - y
+        self._clamp()
+        self.version += 1
+
+    def pan(self, dx, dy):
+        origin = (self.origin_x, self.origin_y)
+        self.origin_x -= dx
+        self.origin_y -= dy
+        self._clamp()
+        if (self.origin_x, self.origin_y) != origin:
+            self.version += 1
+
+    def contains(self, pos):
+        return (self.left <= pos[0] < self.left + self.width and
+                self.top <= pos[1] < self.top + self.height)
+
+    def cell_at(self, pos):
+        # (row, col) under a screen position, or None outside the grid.
+        if not self.contains(pos):
+            return None
+        col = (self.origin_x + pos[0] - self.left) * self.step // self.size
+        row = (self.origin_y + pos[1] - self.top) * self.step // self.size
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row, col
+        return None
+
+    def cell_position(self, row, col):
+        # Screen position of a cell's top-left corner; may be off the panel.
+        return (self.left + col * self.size // self.step - self.origin_x,
+                self.top + row * self.size // self.step - self.origin_y)
+
+    def visible_cells(self):
+        # Half-open (first_row, end_row, first_col, end_col) of the cells that
+        # overlap the panel.
+        size, step = self.size, self.step
+        first_col = self.origin_x * step // size
+        first_row = self.origin_y * step // size
+        end_col = min(self.cols, -(-(self.origin_x + self.width) * step // size))
+        end_row = min(self.rows, -(-(self.origin_y + self.height) * step // size))
+        return first_row, end_row, first_col, end_col
+
+    def grid_extent(self):
+        # Screen rect (x, y, w, h) covered by the grid, clipped to the panel.
+        x, y = self.cell_position(0, 0)
+        right = min(self.left + self.width, x + self.world_width())
+        bottom = min(self.top + self.height, y + self.world_height())
+        x, y = max(x, self.left), max(y, self.top)
+        return x, y, max(0, right - x), max(0, bottom - y)
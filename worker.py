@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+from array import array
+from scheduler import WAITING
+
+# Background jobs for the visualizer. A search runs on a worker thread against
+# a snapshot of the grid while the render loop keeps drawing and polling:
+#
+#   progress    the solver appends its trace (engine.py events) to a shared
+#               CancellableTrace. Only the worker appends and the render loop
+#               only reads the prefix it has seen the length of, so the trace
+#               doubles as a lock-free progress channel.
+#   completion  the job's value, or the exception it raised, is put on a queue
+#               that the render loop polls once a frame.
+#   cancelling  sets a flag that makes the solver's next trace append raise
+#               Cancelled, which ends the search within one event.
+#
+# The worker is a thread, not a process, so it can share the trace with the
+# render loop; Python switches threads every few milliseconds, which keeps
+# input handling and drawing going however long the solve is.
+
+# How long cancel() waits for a traced job to reach its next trace event and
+# stop. Jobs only read snapshots, so this just keeps a cancelled search from
+# competing with the next one. Untraced work (maze generation, flow fields, the
+# landmark index) can't be stopped: it is not waited for and finishes in the
+# background, its value dropped.
+CANCEL_WAIT = 0.1
+
+class Cancelled(Exception):
+    pass
+
+class CancellableTrace(array):
+    # An array('I') trace whose append raises Cancelled once cancelled is set.
+    cancelled = False
+
+    def append(self, event):
+        if self.cancelled:
+            raise Cancelled
+        array.append(self, event)
+
+class Job:
+    def __init__(self, func, args=(), trace=None):
+        self.trace = trace
+        self.cancelled = False
+        self.started = time.perf_counter()
+        self.messages = queue.Queue()
+        self.thread = threading.Thread(target=self._run, args=(func, args), daemon=True)
+        self.thread.start()
+
+    def _run(self, func, args):
+        try:
+            value = func(*args)
+        except Cancelled:
+            return
+        except Exception as e:
+            self.messages.put(("error", e, time.perf_counter() - self.started))
+            return
+        self.messages.put(("done", value, time.perf_counter() - self.started))
+
+    @property
+    def running(self):
+        return not self.cancelled and self.thread.is_alive()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def poll(self):
+        # ("done", value, seconds) or ("error", exception, seconds) once the job
+        # has finished, else None.
+        try:
+            return self.messages.get_nowait()
+        except queue.Empty:
+            return None
+
+    def cancel(self):
+        self.cancelled = True
+        if self.trace is not None:
+            self.trace.cancelled = True
+            self.thread.join(CANCEL_WAIT)
+
+class SearchWorker:
+    # Runs one job at a time; starting a job cancels the one before it.
+    def __init__(self):
+        self.job = None
+
+    def start(self, func, args=(), trace=None):
+        self.cancel()
+        self.job = Job(func, args, trace)
+        return self.job
+
+    @property
+    def busy(self):
+        return self.job is not None and self.job.running
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+
+def wait(job):
+    # Step generator: yields WAITING (scheduler.py) each frame until the job
+    # finishes, then returns its value or raises its exception.
+    while True:
+        message = job.poll()
+        if message is not None:
+            break
+        yield WAITING
+    if message[0] == "error":
+        raise message[1]
+    return message[1]
+
+search_worker = SearchWorker()